@@ -0,0 +1,260 @@
+"""Near-duplicate lookup of graded answers (MinHash signatures + LSH banding).
+
+Practice pools see the same answer over and over with small edits, which an
+exact-match cache misses. Every answer Gemini grades is normalized, shingled
+into word 3-grams and summarized by a 64-value MinHash signature; the
+signature is split into 16 bands of 4 rows, and answers sharing any band for
+the same question become candidates. Only candidates are compared, so a
+lookup costs roughly the number of near neighbours rather than the number of
+stored answers.
+
+A new answer whose estimated similarity to a graded one is at least
+``INTERVIEWBOT_REUSE_THRESHOLD`` (default 0.9) gets that grade without a
+Gemini call; at ``INTERVIEWBOT_SEED_THRESHOLD`` (default 0.7) the earlier
+grade is passed to Gemini as a reference. Both are flagged for review.
+Reuse is off unless ``INTERVIEWBOT_ANSWER_REUSE=1``. Graded answers and flags
+are then appended to ``answer_index.jsonl`` in ``INTERVIEWBOT_DATA_DIR``
+(default ``data``) and replayed on first use. Only the newest
+``INTERVIEWBOT_REUSE_MAX_PER_QUESTION`` answers per question (default 500)
+and the newest ``MAX_FLAGS`` flags are kept; older ones are dropped from
+memory and from the file when it is next loaded. Flags are shown in the
+admin sidebar and printed by ``python -m answer_index``.
+"""
+import collections
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+import zlib
+
+import instrumentation
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+ENABLED = os.environ.get("INTERVIEWBOT_ANSWER_REUSE", "").lower() in ("1", "true", "yes")
+REUSE_THRESHOLD = float(os.environ.get("INTERVIEWBOT_REUSE_THRESHOLD", "0.9"))
+SEED_THRESHOLD = float(os.environ.get("INTERVIEWBOT_SEED_THRESHOLD", "0.7"))
+DATA_DIR = os.environ.get("INTERVIEWBOT_DATA_DIR", "data")
+MAX_PER_QUESTION = int(os.environ.get("INTERVIEWBOT_REUSE_MAX_PER_QUESTION", "500"))
+MAX_FLAGS = 1000
+
+_PRIME = (1 << 61) - 1
+# Fixed seed: signatures written to disk must stay comparable across restarts
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_TOKEN_RE = re.compile(r"[a-z0-9+#@]+")
+
+
+def normalize(text):
+    """Lower-case word tokens with punctuation and spacing differences removed."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def signature(text):
+    """MinHash signature of the answer's word shingles, or None for an empty answer."""
+    tokens = normalize(text)
+    if not tokens:
+        return None
+    size = min(SHINGLE_SIZE, len(tokens))
+    hashes = {zlib.crc32(" ".join(tokens[i:i + size]).encode()) for i in range(len(tokens) - size + 1)}
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def question_key(question, expected_keywords, version=""):
+    """Grades only carry over between answers to the same question, rubric and prompt version."""
+    raw = "\x1f".join([question, version] + list(expected_keywords))
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+class Match:
+    __slots__ = ("entry_id", "similarity", "grade", "answer")
+
+    def __init__(self, entry_id, similarity, grade, answer):
+        self.entry_id = entry_id
+        self.similarity = similarity
+        self.grade = grade
+        self.answer = answer
+
+
+class AnswerIndex:
+    """Graded answers per question, bucketed by LSH band. ``path=None`` keeps it in memory."""
+
+    def __init__(self, path=None, max_per_question=MAX_PER_QUESTION):
+        self.path = path
+        self.max_per_question = max_per_question
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._buckets = {}
+        self._by_question = {}
+        self._flags = collections.deque(maxlen=MAX_FLAGS)
+        self._loaded = path is None
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._entries)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            f = open(self.path, encoding="utf-8")
+        except FileNotFoundError:
+            return
+        records = {}
+        lines = 0
+        with f:
+            for line in f:
+                lines += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash; everything before it is intact
+                    continue
+                if record.get("type") == "answer":
+                    records[record["id"]] = record
+                    for evicted in self._index(record["id"], record["question_key"], tuple(record["signature"]), record["grade"], record["answer"]):
+                        records.pop(evicted, None)
+                elif record.get("type") == "duplicate":
+                    self._flags.append(record)
+        kept = list(records.values()) + list(self._flags)
+        if lines > 2 * len(kept) + 100:
+            self._rewrite(sorted(kept, key=lambda record: record.get("created", 0)))
+
+    def _rewrite(self, records):
+        """Replace the file with only the records still in memory."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def _append(self, record):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def _index(self, entry_id, qkey, sig, grade, answer):
+        """Add an entry; returns the ids evicted to keep the question under its cap."""
+        self._entries[entry_id] = (qkey, sig, grade, answer)
+        for band in range(BANDS):
+            self._buckets.setdefault((qkey, band, sig[band * ROWS:(band + 1) * ROWS]), []).append(entry_id)
+        order = self._by_question.setdefault(qkey, collections.deque())
+        order.append(entry_id)
+        evicted = []
+        while len(order) > self.max_per_question:
+            old_id = order.popleft()
+            _, old_sig, _, _ = self._entries.pop(old_id)
+            for band in range(BANDS):
+                key = (qkey, band, old_sig[band * ROWS:(band + 1) * ROWS])
+                bucket = self._buckets[key]
+                bucket.remove(old_id)
+                if not bucket:
+                    del self._buckets[key]
+            evicted.append(old_id)
+        return evicted
+
+    def add(self, question, expected_keywords, answer, grade, version=""):
+        """Store a graded answer and return its id (None for an empty answer)."""
+        sig = signature(answer)
+        if sig is None:
+            return None
+        qkey = question_key(question, expected_keywords, version)
+        entry_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._ensure_loaded()
+            self._index(entry_id, qkey, sig, grade, answer)
+            self._append({
+                "type": "answer", "id": entry_id, "question_key": qkey, "question": question,
+                "signature": list(sig), "grade": grade, "answer": answer, "created": time.time(),
+            })
+        return entry_id
+
+    def lookup(self, question, expected_keywords, answer, threshold, version=""):
+        """Most similar graded answer at or above ``threshold``, or None."""
+        sig = signature(answer)
+        if sig is None:
+            return None
+        qkey = question_key(question, expected_keywords, version)
+        with self._lock:
+            self._ensure_loaded()
+            candidates = set()
+            for band in range(BANDS):
+                candidates.update(self._buckets.get((qkey, band, sig[band * ROWS:(band + 1) * ROWS]), ()))
+            best = None
+            for entry_id in candidates:
+                _, other, grade, other_answer = self._entries[entry_id]
+                score = similarity(sig, other)
+                if score >= threshold and (best is None or score > best.similarity):
+                    best = Match(entry_id, score, grade, other_answer)
+        instrumentation.incr("answer_index_candidates", value=len(candidates))
+        return best
+
+    def flag(self, match, question, answer, action):
+        """Record that ``answer`` was graded from ``match`` so a reviewer can check it."""
+        record = {
+            "type": "duplicate", "id": uuid.uuid4().hex[:12], "question": question, "answer": answer,
+            "duplicate_of": match.entry_id, "similarity": round(match.similarity, 3), "action": action,
+            "created": time.time(),
+        }
+        with self._lock:
+            self._ensure_loaded()
+            self._flags.append(record)
+            self._append(record)
+        return record
+
+    def review_queue(self):
+        """Flagged duplicates, oldest first, each with the answer it was matched to."""
+        with self._lock:
+            self._ensure_loaded()
+            queue = []
+            for record in self._flags:
+                entry = self._entries.get(record["duplicate_of"])
+                queue.append(dict(record, matched_answer=entry[3] if entry else None, matched_grade=entry[2] if entry else None))
+            return queue
+
+
+_index_lock = threading.Lock()
+_index = None
+
+
+def get_index():
+    """The process-wide index, shared by all sessions."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = AnswerIndex(os.path.join(DATA_DIR, "answer_index.jsonl"))
+        return _index
+
+
+@instrumentation.timed("answer_index_lookup")
+def find_duplicate(question, expected_keywords, answer, version=""):
+    """Closest graded answer that can be reused or used as a seed, or None."""
+    if not ENABLED:
+        return None
+    return get_index().lookup(question, expected_keywords, answer, min(SEED_THRESHOLD, REUSE_THRESHOLD), version)
+
+
+def record_grade(question, expected_keywords, answer, grade, version=""):
+    if ENABLED:
+        get_index().add(question, expected_keywords, answer, grade, version)
+
+
+if __name__ == "__main__":
+    for item in get_index().review_queue():
+        print(json.dumps(item))
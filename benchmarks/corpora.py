@@ -0,0 +1,122 @@
+"""Deterministic synthetic resumes, answers and interviews for the benchmarks."""
+import random
+
+import question_bank
+from interview_core import COMMON_SKILLS, TECHNICAL_QUESTIONS, GENERIC_QUESTIONS
+
+WORDS_PER_PAGE = 450
+
+FILLER = (
+    "delivered features for a large customer base while keeping the platform stable and easy "
+    "to maintain across several teams and time zones with a focus on measurable outcomes"
+).split()
+
+CONTEXT_PHRASES = [
+    "Experience with", "Proficient in", "Worked with", "Knowledge of",
+    "Built services using", "Expertise in", "Developed with",
+]
+
+SECTIONS = ["Summary", "Skills", "Experience", "Projects", "Education"]
+
+
+def _sentence(rng, skills):
+    """One resume sentence mentioning a couple of skills after a context phrase."""
+    picked = rng.sample(skills, k=min(len(skills), rng.randint(1, 3)))
+    filler = " ".join(rng.choice(FILLER) for _ in range(rng.randint(8, 16)))
+    return f"{rng.choice(CONTEXT_PHRASES)} {', '.join(picked)} and {filler}."
+
+
+def make_resume(pages, seed=0):
+    """Return a plain-text resume of roughly ``pages`` pages."""
+    rng = random.Random(seed)
+    all_skills = sorted({skill for skills in COMMON_SKILLS.values() for skill in skills})
+    target_words = pages * WORDS_PER_PAGE
+    lines = ["Jane Doe", "jane.doe@example.com"]
+    words = 0
+    year = 2024
+    while words < target_words:
+        for section in SECTIONS:
+            lines.append("")
+            lines.append(section)
+            if section == "Experience":
+                lines.append(f"Senior Engineer, Example Corp ({year - 2} - {year})")
+                year -= 2
+            for _ in range(rng.randint(3, 6)):
+                sentence = _sentence(rng, all_skills)
+                lines.append(sentence)
+                words += len(sentence.split())
+            if words >= target_words:
+                break
+    return "\n".join(lines)
+
+
+def make_answer(expected_keywords, words=60, coverage=0.6, seed=0):
+    """Return an answer of ``words`` words mentioning ``coverage`` of the keywords."""
+    rng = random.Random(seed)
+    keep = max(1, int(len(expected_keywords) * coverage))
+    mentioned = rng.sample(list(expected_keywords), k=min(keep, len(expected_keywords)))
+    tokens = [rng.choice(FILLER) for _ in range(max(words - len(mentioned), 0))]
+    for keyword in mentioned:
+        tokens.insert(rng.randint(0, len(tokens)), keyword)
+    return " ".join(tokens).capitalize() + "."
+
+
+def make_question_bank(count):
+    """Return ``count`` questions with unique text, cycling over the built-in bank."""
+    base = [q for questions in TECHNICAL_QUESTIONS.values() for q in questions] + list(GENERIC_QUESTIONS)
+    questions = []
+    for i in range(count):
+        q = base[i % len(base)]
+        suffix = "" if i < len(base) else f" (variant {i // len(base)})"
+        questions.append({"question": q["question"] + suffix, "expected_keywords": list(q["expected_keywords"])})
+    return questions
+
+
+def make_bank_snapshot(count):
+    """Return a question bank snapshot with ``count`` technical questions spread over the built-in skills."""
+    skills = list(TECHNICAL_QUESTIONS)
+    technical = {}
+    for i, q in enumerate(make_question_bank(count)):
+        technical.setdefault(skills[i % len(skills)], []).append(q)
+    return question_bank.build_snapshot(0, technical, GENERIC_QUESTIONS)
+
+
+def make_interview(num_questions, answer_words=60, seed=0):
+    """Return a completed interview in the shapes used by the app and by smail."""
+    rng = random.Random(seed)
+    questions = make_question_bank(num_questions)
+    skills = {category: skill_list[:4] for category, skill_list in COMMON_SKILLS.items()}
+    evaluations = {}
+    report_questions = []
+    for i, q in enumerate(questions):
+        answer = make_answer(q["expected_keywords"], words=answer_words, seed=seed + i)
+        missing = [k for k in q["expected_keywords"] if k not in answer]
+        score = rng.randint(30, 100)
+        evaluation = {"score": score, "feedback": "Solid answer with room for more depth.", "missing_concepts": missing}
+        evaluations[q["question"]] = {"answer": answer, "evaluation": evaluation}
+        report_questions.append({
+            "question_number": i + 1,
+            "question_text": q["question"],
+            "answer": answer,
+            "score": score,
+            "feedback": evaluation["feedback"],
+            "missing_concepts": missing,
+        })
+    scores = [q["score"] for q in report_questions]
+    avg_score = sum(scores) / len(scores) if scores else 0
+    return {
+        "candidate_name": "Jane Doe",
+        "date": "2024-01-01 09:00",
+        "avg_score": avg_score,
+        "rating": "Good",
+        "skills": skills,
+        "questions": questions,
+        "evaluations": evaluations,
+        "report": {
+            "date": "2024-01-01 09:00",
+            "overall_score": avg_score,
+            "rating": "Good",
+            "skills": skills,
+            "questions": report_questions,
+        },
+    }
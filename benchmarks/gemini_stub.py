@@ -0,0 +1,186 @@
+"""Local stand-in for the Gemini grading endpoint.
+
+The stub grades by keyword overlap so results are deterministic, answers
+question generation requests with templated questions, and can add a fixed
+latency to imitate the network round-trip. ``replies`` makes it answer with
+canned texts first, e.g. malformed or truncated JSON.
+"""
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+import interview_core
+
+
+def grade_prompt(prompt):
+    """Return the JSON grade the stub would produce for a grading prompt."""
+    answer_match = re.search(r"Candidate's Answer:(.*?)\n\s*Expected keywords or concepts:", prompt, re.S)
+    keywords_match = re.search(r"Expected keywords or concepts:(.*)", prompt)
+    answer = answer_match.group(1).lower() if answer_match else ""
+    keywords = [k.strip() for k in keywords_match.group(1).split(",") if k.strip()] if keywords_match else []
+    missing = [k for k in keywords if k.lower() not in answer]
+    score = round(100 * (len(keywords) - len(missing)) / len(keywords)) if keywords else 50
+    return {"score": score, "feedback": "Stub grade based on keyword coverage.", "missing_concepts": missing}
+
+
+def question_prompt(prompt):
+    """Return the JSON questions the stub would produce for a question generation prompt."""
+    skill_match = re.search(r"Skill: (.*)", prompt)
+    difficulty_match = re.search(r"Difficulty: (.*)", prompt)
+    count_match = re.search(r"Number of questions: (\d+)", prompt)
+    skill = skill_match.group(1).strip() if skill_match else "software"
+    difficulty = difficulty_match.group(1).strip() if difficulty_match else "intermediate"
+    count = int(count_match.group(1)) if count_match else 3
+    return {"questions": [
+        {"question": f"({difficulty}) Describe situation {i + 1} in which you would use {skill}, and what you would watch out for.",
+         "expected_keywords": [skill, "trade-off", "performance", f"example {i + 1}"]}
+        for i in range(count)
+    ]}
+
+
+def reply_text(request_json, replies=None):
+    """The text the stub model replies with for a request body.
+
+    ``replies`` is an iterator of canned texts used, in order, before falling
+    back to the generated reply.
+    """
+    canned = next(replies, None) if replies is not None else None
+    if canned is not None:
+        return canned
+    prompt = request_json["contents"][0]["parts"][0]["text"]
+    schema = request_json.get("generationConfig", {}).get("responseSchema", {})
+    if "questions" in schema.get("properties", {}):
+        return json.dumps(question_prompt(prompt))
+    return json.dumps(grade_prompt(prompt))
+
+
+def generate_content_payload(request_json, replies=None):
+    """Build a generateContent response body for a request body."""
+    return {"candidates": [{"content": {"parts": [{"text": reply_text(request_json, replies)}]}}]}
+
+
+def stream_lines(request_json, chunk_size=24, replies=None):
+    """Server-sent event lines for a streamGenerateContent response."""
+    text = reply_text(request_json, replies)
+    for i in range(0, len(text), chunk_size):
+        chunk = {"candidates": [{"content": {"parts": [{"text": text[i:i + chunk_size]}]}}]}
+        # Gemini sends non-ASCII text as raw UTF-8
+        yield "data: " + json.dumps(chunk, ensure_ascii=False)
+        yield ""
+
+
+class StubResponse:
+    def __init__(self, payload, status_code=200, lines=None):
+        self._payload = payload
+        self._lines = lines or []
+        self.status_code = status_code
+        self.headers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def json(self):
+        return self._payload
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self._lines)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise interview_core.requests.HTTPError(f"{self.status_code} from Gemini stub")
+
+
+def make_post(latency=0.0, replies=None):
+    """Return a drop-in replacement for ``requests.post`` that answers like Gemini."""
+    replies = iter(replies) if replies is not None else None
+
+    def post(url, headers=None, json=None, **kwargs):
+        if latency:
+            time.sleep(latency)
+        if kwargs.get("stream"):
+            return StubResponse(None, lines=list(stream_lines(json, replies=replies)))
+        return StubResponse(generate_content_payload(json, replies))
+    return post
+
+
+# The stub has no quota; keep the process-wide limiter out of the measurements
+UNLIMITED = json.dumps({"default": {"requests_per_minute": 10 ** 9, "burst": 10 ** 9, "max_concurrency": 10 ** 6}})
+
+
+@contextmanager
+def installed(latency=0.0, answer_reuse=False, replies=None):
+    """Route Gemini calls made through ``interview_core`` to the stub.
+
+    Near-duplicate reuse is off by default so repeated benchmark answers still
+    reach the stub.
+    """
+    with mock.patch.dict(os.environ, {"GEMINI_API_KEY": "stub-key", "GEMINI_RATE_LIMITS": UNLIMITED}), \
+            mock.patch.object(interview_core.requests, "post", make_post(latency, replies)), \
+            mock.patch.object(interview_core.answer_index, "ENABLED", answer_reuse):
+        yield
+
+
+def serve(port=0, latency=0.0, host="127.0.0.1", replies=None):
+    """Start an HTTP Gemini stand-in on a daemon thread and return the server.
+
+    Point the app at it with ``GEMINI_API_URL=http://host:port/v1beta/models/stub:generateContent``.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    import threading
+
+    replies = iter(replies) if replies is not None else None
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            request_json = json.loads(body or b"{}")
+            if latency:
+                time.sleep(latency)
+            if ":streamGenerateContent" in self.path:
+                payload = "".join(line + "\n" for line in stream_lines(request_json, replies=replies)).encode()
+                content_type = "text/event-stream"
+            else:
+                payload = json.dumps(generate_content_payload(request_json, replies)).encode()
+                content_type = "application/json"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="gemini-stub", daemon=True).start()
+    return server
+
+
+def server_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v1beta/models/stub:generateContent"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local Gemini stand-in.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    args = parser.parse_args()
+    stub = serve(args.port, args.latency)
+    print(f"Gemini stub listening; set GEMINI_API_URL={server_url(stub)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
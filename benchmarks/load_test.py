@@ -0,0 +1,292 @@
+"""Concurrent load test of the full interview flow.
+
+Simulated candidates run end-to-end through the real ``streamlit_app.py``
+with Streamlit's ``AppTest`` driver: upload a resume, confirm skills, answer
+every question and export the PDF. Like a Streamlit server, all sessions of
+a level share one process (one thread per session); each concurrency level
+runs in a fresh process so its CPU and memory figures stand alone. Gemini is
+served by the local HTTP stub from ``benchmarks.gemini_stub``.
+
+Usage:
+    python -m benchmarks.load_test --levels 1 2 4 8 16 --questions 5 --latency 0.3
+    python -m benchmarks.load_test --levels 4 --output load.json
+
+The saturation point is the first level at which throughput grows by less
+than ``--min-gain`` over the previous level or the p95 turn latency exceeds
+``--slo-ms``.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks import corpora, gemini_stub
+from benchmarks.run_benchmarks import percentile
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+
+
+def make_resume_file(fmt, pages, seed):
+    """Return an ``(filename, bytes, mime_type)`` upload for a synthetic resume."""
+    text = corpora.make_resume(pages, seed=seed)
+    if fmt == "docx":
+        import docx
+
+        document = docx.Document()
+        for line in text.split("\n"):
+            document.add_paragraph(line)
+        buffer = io.BytesIO()
+        document.save(buffer)
+        return "resume.docx", buffer.getvalue(), "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", "", 11)
+    for line in text.split("\n"):
+        pdf.multi_cell(0, 6, line)
+    data = pdf.output(dest="S")
+    return "resume.pdf", data.encode("latin-1") if isinstance(data, str) else bytes(data), "application/pdf"
+
+
+def _rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+# Streamlit internals patched by pin_shared_runtime(), checked against streamlit 1.66
+STREAMLIT_INTERNALS = [
+    ("local_script_runner", "ScriptCache"),
+    ("app_test", "ScriptCache"),
+    ("app_test", "Runtime.instance"),
+    ("app_test", "Runtime.exists"),
+    ("app_test", "MediaFileManager"),
+    ("app_test", "MemoryMediaFileStorage"),
+    ("app_test", "DataframeSourceManager"),
+    ("app_test", "MemoryCacheStorageManager"),
+    ("app_test", "BidiComponentManager.discover_and_register_components"),
+]
+
+
+def missing_streamlit_internals():
+    """The names in ``STREAMLIT_INTERNALS`` this Streamlit version does not have."""
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    modules = {"app_test": app_test, "local_script_runner": local_script_runner}
+    missing = []
+    for module, name in STREAMLIT_INTERNALS:
+        obj = modules[module]
+        for part in name.split("."):
+            obj = getattr(obj, part, None)
+        if obj is None:
+            missing.append(f"streamlit.testing.v1.{module}.{name}")
+    return missing
+
+
+def pin_shared_runtime():
+    """Give every concurrent AppTest the same mock Runtime and script cache.
+
+    AppTest installs a fresh global mock Runtime before each run and clears it
+    afterwards, which races when sessions run on several threads at once, and
+    compiles the script per session. The real server has a single Runtime and
+    bytecode cache shared by all sessions.
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    script_cache = app_test.ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+
+    runtime = MagicMock(spec=app_test.Runtime)
+    runtime.media_file_mgr = app_test.MediaFileManager(app_test.MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = app_test.DataframeSourceManager()
+    runtime.cache_storage_manager = app_test.MemoryCacheStorageManager()
+    registry = app_test.BidiComponentManager()
+    registry.discover_and_register_components(start_file_watching=False)
+    runtime.bidi_component_registry = registry
+    app_test.Runtime.instance = classmethod(lambda cls: runtime)
+    app_test.Runtime.exists = classmethod(lambda cls: True)
+
+
+def run_candidate(candidate_id, args, resume, turns, errors, start_barrier):
+    """Drive one session through the whole interview, appending ``(kind, seconds)`` to ``turns``."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(SCRIPT, default_timeout=args.turn_timeout)
+
+    def turn(kind, action):
+        start = time.perf_counter()
+        action()
+        turns.append((kind, time.perf_counter() - start))
+        if len(at.exception):
+            raise RuntimeError(f"{kind}: {at.exception[0].message}")
+
+    try:
+        start_barrier.wait()
+        turn("load", at.run)
+        turn("settings", lambda: at.slider[0].set_value(args.questions).run())
+        turn("upload", lambda: at.file_uploader[0].set_value(resume).run())
+        if at.session_state.bot_state != "confirm_skills":
+            raise RuntimeError(f"upload ended in state {at.session_state.bot_state}")
+        turn("confirm_skills", lambda: at.chat_input[0].set_value("start interview").run())
+        answered = 0
+        while at.session_state.bot_state == "interview":
+            question = at.session_state.questions[at.session_state.current_question_index]
+            answer = corpora.make_answer(question["expected_keywords"], words=args.answer_words, seed=candidate_id * 100 + answered)
+            turn("answer", lambda: at.chat_input[0].set_value(answer).run())
+            answered += 1
+        turn("export", lambda: at.chat_input[0].set_value("export pdf").run())
+        if "ready" not in at.session_state.chat_messages[-1]["content"]:
+            raise RuntimeError("export did not produce a PDF")
+    except Exception as e:
+        errors.append(f"candidate {candidate_id}: {e}")
+
+
+def run_level(level, args, result_queue):
+    """Child process: run ``level`` concurrent candidates and report one summary dict."""
+    # Import the app's modules and parse a resume once so the level measures steady state
+    from streamlit.testing.v1 import AppTest
+
+    pin_shared_runtime()
+    resume = make_resume_file(args.resume_format, args.pages, seed=level)
+    AppTest.from_file(SCRIPT, default_timeout=args.turn_timeout).run()
+
+    turns, errors = [], []
+    barrier = threading.Barrier(level + 1)
+    threads = [
+        threading.Thread(target=run_candidate, args=(i, args, resume, turns, errors, barrier), daemon=True)
+        for i in range(level)
+    ]
+    for thread in threads:
+        thread.start()
+
+    peak_rss = [_rss_mb()]
+    baseline_rss = peak_rss[0]
+    done = threading.Event()
+
+    def sample_rss():
+        while not done.wait(0.05):
+            peak_rss[0] = max(peak_rss[0], _rss_mb())
+
+    threading.Thread(target=sample_rss, daemon=True).start()
+    cpu_start = resource.getrusage(resource.RUSAGE_SELF)
+    barrier.wait()
+    wall_start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+    cpu_end = resource.getrusage(resource.RUSAGE_SELF)
+    done.set()
+
+    cpu = (cpu_end.ru_utime - cpu_start.ru_utime) + (cpu_end.ru_stime - cpu_start.ru_stime)
+    latencies = sorted(seconds for _, seconds in turns)
+    by_kind = {}
+    for kind, seconds in turns:
+        by_kind.setdefault(kind, []).append(seconds)
+    result_queue.put({
+        "level": level,
+        "completed": level - len(errors),
+        "errors": errors[:10],
+        "turns": len(turns),
+        "wall_seconds": wall,
+        "turns_per_sec": len(turns) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "per_turn_kind": {
+            kind: {"count": len(samples), "p50_ms": percentile(sorted(samples), 50) * 1000,
+                   "p95_ms": percentile(sorted(samples), 95) * 1000}
+            for kind, samples in by_kind.items()
+        },
+        "cpu_seconds": cpu,
+        "cpu_seconds_per_session": cpu / level,
+        "rss_baseline_mb": baseline_rss,
+        "rss_peak_mb": peak_rss[0],
+        "rss_per_session_mb": max(peak_rss[0] - baseline_rss, 0.0) / level,
+    })
+
+
+def find_saturation(results, min_gain, slo_ms):
+    """Return the first level that no longer scales (or breaks the SLO), or None."""
+    previous = None
+    for result in results:
+        if result["errors"] or result["p95_ms"] > slo_ms:
+            return result["level"]
+        if previous and result["turns_per_sec"] < previous["turns_per_sec"] * (1 + min_gain):
+            return result["level"]
+        previous = result
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="Concurrent candidates per run")
+    parser.add_argument("--questions", type=int, default=5, help="Questions per interview (3-10, the app's slider range)")
+    parser.add_argument("--answer-words", type=int, default=60)
+    parser.add_argument("--pages", type=int, default=2, help="Resume length in pages")
+    parser.add_argument("--resume-format", choices=["pdf", "docx"], default="pdf")
+    parser.add_argument("--latency", type=float, default=0.3, help="Gemini stub latency in seconds")
+    parser.add_argument("--rate-limits", default=gemini_stub.UNLIMITED,
+                        help="GEMINI_RATE_LIMITS for the app (default: unlimited)")
+    parser.add_argument("--turn-timeout", type=float, default=120.0)
+    parser.add_argument("--slo-ms", type=float, default=2000.0, help="p95 turn latency budget")
+    parser.add_argument("--min-gain", type=float, default=0.1,
+                        help="Minimum throughput gain per level before the server counts as saturated")
+    parser.add_argument("--output", metavar="PATH", help="Write all results as JSON")
+    args = parser.parse_args(argv)
+
+    missing = missing_streamlit_internals()
+    if missing:
+        import streamlit
+
+        raise SystemExit(f"The load test relies on Streamlit internals that streamlit {streamlit.__version__} "
+                         f"does not have ({', '.join(missing)}); install streamlit 1.66")
+
+    stub = gemini_stub.serve(latency=args.latency)
+    # Children inherit these before they import the app
+    os.environ["GEMINI_API_URL"] = gemini_stub.server_url(stub)
+    os.environ["GEMINI_API_KEY"] = "stub-key"
+    os.environ["GEMINI_RATE_LIMITS"] = args.rate_limits
+    data_dir = tempfile.TemporaryDirectory()
+    os.environ["INTERVIEWBOT_DATA_DIR"] = data_dir.name
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    print(f"{'level':>5} {'done':>5} {'turns/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'cpu s/sess':>10} {'MB/sess':>8}")
+    for level in args.levels:
+        queue = context.Queue()
+        process = context.Process(target=run_level, args=(level, args, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        results.append(result)
+        print(f"{level:>5} {result['completed']:>5} {result['turns_per_sec']:8.2f} {result['p50_ms']:9.1f} "
+              f"{result['p95_ms']:9.1f} {result['p99_ms']:9.1f} {result['cpu_seconds_per_session']:10.3f} "
+              f"{result['rss_per_session_mb']:8.2f}")
+        for error in result["errors"]:
+            print(f"      error: {error}")
+
+    saturation = find_saturation(results, args.min_gain, args.slo_ms)
+    if saturation is None:
+        print(f"\nNo saturation up to {args.levels[-1]} concurrent candidates")
+    else:
+        print(f"\nSaturated at {saturation} concurrent candidates")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "levels": results, "saturation_level": saturation}, f, indent=2)
+    stub.shutdown()
+    data_dir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""Benchmark the resume, grading and report hot paths.
+
+Usage:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --quick --only extract_skills
+    python -m benchmarks.run_benchmarks --save benchmarks/baselines/local.json
+    python -m benchmarks.run_benchmarks --compare benchmarks/baselines/local.json
+
+Everything runs offline: Gemini is replaced by ``benchmarks.gemini_stub``.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import answer_index
+import interview_core
+import smail
+from benchmarks import corpora, gemini_stub
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_samples)) - 1, 0)
+    return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+
+def measure(fn, runs, warmup=1):
+    """Call ``fn`` ``warmup + runs`` times and return the timed durations in seconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples, units=1, unit="op"):
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "runs": len(ordered),
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "mean_ms": total / len(ordered) * 1000,
+        "ops_per_sec": len(ordered) / total if total else 0.0,
+        "unit": unit,
+        "units_per_sec": len(ordered) * units / total if total else 0.0,
+    }
+
+
+def build_cases(quick=False):
+    """Return ``(name, fn, runs, units, unit)`` tuples for every benchmark."""
+    scale = 0.2 if quick else 1.0
+
+    def runs(n):
+        return max(int(n * scale), 3)
+
+    cases = []
+    for pages in (1, 50):
+        resume = corpora.make_resume(pages, seed=pages)
+        cases.append((f"extract_skills/{pages}p", lambda r=resume: interview_core.extract_skills(r),
+                      runs(50 if pages == 1 else 10), pages, "page"))
+        cases.append((f"preprocess_text/resume_{pages}p", lambda r=resume: interview_core.preprocess_text(r),
+                      runs(50 if pages == 1 else 5), pages, "page"))
+
+    question = interview_core.TECHNICAL_QUESTIONS["python"][0]
+    for words in (50, 500):
+        answer = corpora.make_answer(question["expected_keywords"], words=words, seed=words)
+        cases.append((f"preprocess_text/answer_{words}w", lambda a=answer: interview_core.preprocess_text(a),
+                      runs(200), words, "word"))
+        cases.append((f"evaluate_answer_with_nlp/{words}w",
+                      lambda a=answer: interview_core.evaluate_answer_with_nlp(question["question"], a, question["expected_keywords"]),
+                      runs(200), 1, "answer"))
+        cases.append((f"validate_answer_with_gemini/stub_{words}w",
+                      lambda a=answer: interview_core.validate_answer_with_gemini(question["question"], a, question["expected_keywords"]),
+                      runs(200), 1, "answer"))
+
+    for stored in (100, 2000):
+        index = answer_index.AnswerIndex(max_per_question=stored)
+        for i in range(stored):
+            index.add(question["question"], question["expected_keywords"],
+                      corpora.make_answer(question["expected_keywords"], words=60, seed=i), {"score": 50})
+        probe = corpora.make_answer(question["expected_keywords"], words=60, seed=stored + 1)
+        cases.append((f"answer_index.lookup/{stored}_stored",
+                      lambda idx=index, p=probe: idx.lookup(question["question"], question["expected_keywords"], p, 0.7),
+                      runs(200), 1, "answer"))
+
+    for num_questions in (3, 100):
+        interview = corpora.make_interview(num_questions, seed=num_questions)
+        per_interview = runs(30 if num_questions == 3 else 5)
+        # The built-in bank is too small for 100 questions; count only what is returned
+        bank = corpora.make_bank_snapshot(num_questions)
+        pick = lambda i=interview, n=num_questions, b=bank: interview_core.generate_technical_questions(i["skills"], n, bank=b)
+        cases.append((f"generate_technical_questions/{num_questions}q", pick, runs(200), len(pick()), "question"))
+        cases.append((f"generate_interview_summary/{num_questions}q",
+                      lambda i=interview: interview_core.generate_interview_summary(
+                          i["candidate_name"], i["date"], i["avg_score"], i["rating"],
+                          i["skills"], i["evaluations"], i["questions"]),
+                      runs(200), num_questions, "question"))
+        cases.append((f"export_results_as_pdf/{num_questions}q",
+                      lambda i=interview: interview_core.export_results_as_pdf(
+                          i["candidate_name"], i["date"], i["avg_score"], i["rating"],
+                          i["skills"], i["evaluations"], i["questions"]),
+                      per_interview, num_questions, "question"))
+        cases.append((f"smail.generate_interview_results_pdf/{num_questions}q",
+                      lambda i=interview: smail.generate_interview_results_pdf(i["report"]),
+                      per_interview, num_questions, "question"))
+    return cases
+
+
+def run(only=None, quick=False):
+    results = {}
+    # export_results_as_pdf writes into the working directory
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, gemini_stub.installed():
+        os.chdir(workdir)
+        try:
+            for name, fn, runs, units, unit in build_cases(quick):
+                if only and not any(name.startswith(prefix) for prefix in only):
+                    continue
+                results[name] = summarize(measure(fn, runs), units, unit)
+                print_result(name, results[name])
+        finally:
+            os.chdir(cwd)
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "nlp_enabled": interview_core.NLP_ENABLED,
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def print_result(name, result):
+    print(f"{name:<48} p50 {result['p50_ms']:9.3f} ms  p99 {result['p99_ms']:9.3f} ms  "
+          f"{result['units_per_sec']:12.1f} {result['unit']}/s")
+
+
+def compare(current, baseline, threshold):
+    """Print p50 deltas against a baseline and return the names that regressed."""
+    regressions = []
+    print(f"\n{'benchmark':<48} {'base p50':>10} {'new p50':>10} {'delta':>8}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"{name:<48} {'-':>10} {result['p50_ms']:10.3f} {'new':>8}")
+            continue
+        delta = (result["p50_ms"] - base["p50_ms"]) / base["p50_ms"] if base["p50_ms"] else 0.0
+        flag = ""
+        if delta > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<48} {base['p50_ms']:10.3f} {result['p50_ms']:10.3f} {delta:+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", help="Run only benchmarks whose name starts with one of these prefixes")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations, for smoke runs")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a saved JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed p50 slowdown before a benchmark counts as regressed (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    current = run(args.only, args.quick)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
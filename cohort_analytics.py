@@ -0,0 +1,192 @@
+"""Cohort analytics over the exported interview results.
+
+Reads the Parquet datasets written by ``results_export`` and computes, with
+pandas/NumPy column operations only (no per-row Python):
+
+* score distributions per cohort (month, week, prompt version, grader, skill)
+* per-question difficulty: mean score, pass rate and discrimination (the
+  correlation between a question's score and the rest of the interview)
+* per-skill pass rates, by the question's skill or by the skills found on the
+  candidates' resumes
+
+Usage:
+    python -m cohort_analytics
+    python -m cohort_analytics --by prompt_version --pass-mark 70
+    python -m cohort_analytics --synthetic 2000000     # time it on generated rows
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import results_export
+from results_export import PASS_MARK, RESULTS_DIR
+
+COHORTS = ("month", "week", "prompt_version", "grader", "skill")
+
+
+def load_answers(results_dir=RESULTS_DIR, columns=None):
+    # The full schema, so part files from before a column existed read as nulls
+    return pd.read_parquet(os.path.join(results_dir, "answers"), columns=columns, schema=results_export.ANSWER_SCHEMA)
+
+
+def load_interviews(results_dir=RESULTS_DIR, columns=None):
+    return pd.read_parquet(os.path.join(results_dir, "interviews"), columns=columns)
+
+
+def cohort_key(answers, by):
+    """Series to group answer rows by for a cohort name (or any column)."""
+    if by in ("month", "week"):
+        completed = answers["completed_at"].to_numpy().astype("datetime64[D]")
+        if by == "month":
+            periods = completed.astype("datetime64[M]")
+        else:
+            # 1970-01-01 was a Thursday; weeks start on Monday
+            periods = completed - (completed.astype(np.int64) + 3) % 7
+        # Label the few distinct periods instead of formatting every row
+        labels, codes = np.unique(periods, return_inverse=True)
+        return pd.Series(pd.Categorical.from_codes(codes, [str(label) for label in labels]), index=answers.index, name=by)
+    return answers[by]
+
+
+def score_distribution(answers, by=None, bins=10):
+    """Count, mean, spread, percentiles and a score histogram per cohort."""
+    scores = answers["score"].to_numpy(dtype=np.float32)
+    key = cohort_key(answers, by) if by else pd.Series(np.zeros(len(answers), dtype=np.int8), index=answers.index, name="all")
+    grouped = pd.Series(scores, index=answers.index).groupby(key, observed=True)
+    stats = grouped.agg(["count", "mean", "std"])
+    quantiles = grouped.quantile([0.1, 0.25, 0.5, 0.75, 0.9]).unstack()
+    quantiles.columns = [f"p{int(q * 100)}" for q in quantiles.columns]
+
+    width = 100 / bins
+    bucket = np.clip((scores // width).astype(np.int16), 0, bins - 1)
+    histogram = pd.crosstab(key, bucket)
+    histogram = histogram.reindex(columns=range(bins), fill_value=0)
+    histogram.columns = [f"{int(i * width)}-{int((i + 1) * width)}" for i in range(bins)]
+    return pd.concat([stats, quantiles, histogram], axis=1)
+
+
+def question_difficulty(answers, pass_mark=PASS_MARK):
+    """Per-question mean score, pass rate, difficulty and discrimination."""
+    score = answers["score"].to_numpy(dtype=np.float64)
+    interview = answers["interview_id"]
+    totals = pd.Series(score, index=answers.index).groupby(interview, observed=True).transform("sum").to_numpy()
+    counts = interview.map(interview.value_counts()).to_numpy(dtype=np.float64)
+    # Mean of the candidate's other answers in the same interview
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rest = np.where(counts > 1, (totals - score) / (counts - 1), np.nan)
+
+    frame = pd.DataFrame({
+        "question_id": answers["question_id"],
+        "score": score,
+        "passed": score >= pass_mark,
+        "x": score,
+        "y": rest,
+    })
+    frame["xy"] = frame["x"] * frame["y"]
+    frame["xx"] = frame["x"] ** 2
+    frame["yy"] = frame["y"] ** 2
+    valid = frame["y"].notna()
+    grouped = frame.groupby("question_id", observed=True)
+    result = grouped.agg(answers=("score", "size"), mean_score=("score", "mean"), pass_rate=("passed", "mean"))
+    result["difficulty"] = 1 - result["mean_score"] / 100
+
+    # Pearson correlation from grouped moments, over rows that have a rest score
+    moments = frame[valid].groupby("question_id", observed=True)[["x", "y", "xy", "xx", "yy"]].sum()
+    n = frame[valid].groupby("question_id", observed=True).size()
+    cov = moments["xy"] - moments["x"] * moments["y"] / n
+    var_x = moments["xx"] - moments["x"] ** 2 / n
+    var_y = moments["yy"] - moments["y"] ** 2 / n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result["discrimination"] = cov / np.sqrt(var_x * var_y)
+    return result.sort_values("mean_score")
+
+
+def skill_pass_rates(answers, interviews=None, pass_mark=PASS_MARK):
+    """Pass rates by question skill, or by resume skill when ``interviews`` is given."""
+    passed = answers["score"].to_numpy() >= pass_mark
+    if interviews is None:
+        frame = pd.DataFrame({"skill": answers["skill"], "score": answers["score"], "passed": passed})
+        return frame.groupby("skill", observed=True).agg(
+            answers=("passed", "size"), pass_rate=("passed", "mean"), mean_score=("score", "mean"),
+        ).sort_values("pass_rate")
+
+    per_interview = pd.DataFrame({"interview_id": answers["interview_id"], "passed": passed, "score": answers["score"]}) \
+        .groupby("interview_id", observed=True).agg(answers=("passed", "size"), passed=("passed", "sum"), score_sum=("score", "sum"))
+    skills = interviews[["interview_id", "skills"]].explode("skills").dropna().rename(columns={"skills": "skill"})
+    joined = skills.merge(per_interview, left_on="interview_id", right_index=True)
+    result = joined.groupby("skill").agg(
+        candidates=("interview_id", "size"), answers=("answers", "sum"), passed=("passed", "sum"), score_sum=("score_sum", "sum"),
+    )
+    result["pass_rate"] = result["passed"] / result["answers"]
+    result["mean_score"] = result["score_sum"] / result["answers"]
+    return result.drop(columns=["passed", "score_sum"]).sort_values("pass_rate")
+
+
+def synthetic_answers(rows, questions=30, questions_per_interview=5, seed=0):
+    """Generated answer rows with the export schema, for timing the analytics."""
+    rng = np.random.default_rng(seed)
+    interviews = rows // questions_per_interview
+    question_ids = [f"skill{i % 8}/{i}" for i in range(questions)]
+    question = rng.integers(0, questions, rows)
+    ability = rng.normal(60, 15, interviews)
+    score = np.clip(np.repeat(ability, questions_per_interview)[:rows] + rng.normal(0, 15, rows) - question, 0, 100).round()
+    start = np.datetime64("2025-01-01T00:00:00")
+    completed = start + rng.integers(0, 365 * 86400, interviews).astype("timedelta64[s]")
+    return pd.DataFrame({
+        "interview_id": np.repeat(np.arange(interviews), questions_per_interview)[:rows],
+        "completed_at": np.repeat(completed, questions_per_interview)[:rows],
+        "question_id": pd.Categorical.from_codes(question, question_ids),
+        "skill": pd.Categorical.from_codes(question % 8, [f"skill{i}" for i in range(8)]),
+        "score": score.astype(np.float32),
+        "prompt_version": pd.Categorical.from_codes(rng.integers(0, 2, rows), ["v1", "v2"]),
+        "grader": pd.Categorical.from_codes((rng.random(rows) < 0.05).astype(np.int8), ["gemini", "nlp"]),
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--by", choices=COHORTS, default="month", help="Cohort for the score distribution")
+    parser.add_argument("--pass-mark", type=float, default=PASS_MARK)
+    parser.add_argument("--candidate-skills", action="store_true", help="Pass rates by resume skill instead of question skill")
+    parser.add_argument("--synthetic", type=int, metavar="ROWS", help="Run on generated answer rows and print timings")
+    args = parser.parse_args(argv)
+
+    timings = {}
+
+    def timed(name, fn, *fn_args, **fn_kwargs):
+        start = time.perf_counter()
+        result = fn(*fn_args, **fn_kwargs)
+        timings[name] = time.perf_counter() - start
+        return result
+
+    interviews = None
+    if args.synthetic:
+        answers = timed("generate", synthetic_answers, args.synthetic)
+    else:
+        if not os.path.isdir(os.path.join(args.results_dir, "answers")):
+            print(f"No exported results in {args.results_dir}; run python -m results_export first")
+            return 1
+        answers = timed("load_answers", load_answers, args.results_dir)
+        if args.candidate_skills:
+            interviews = timed("load_interviews", load_interviews, args.results_dir, ["interview_id", "skills"])
+
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_columns", 30)
+    print(f"Score distribution by {args.by}")
+    print(timed("score_distribution", score_distribution, answers, args.by).round(2).to_string())
+    print("\nQuestion difficulty (hardest first)")
+    print(timed("question_difficulty", question_difficulty, answers, args.pass_mark).round(3).to_string())
+    print("\nSkill pass rates")
+    print(timed("skill_pass_rates", skill_pass_rates, answers, interviews, args.pass_mark).round(3).to_string())
+
+    print(f"\n{len(answers)} answer rows; " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
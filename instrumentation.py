@@ -0,0 +1,243 @@
+"""Process-wide stage timers and counters for the interview hot paths.
+
+Streamlit serves every session from one process, so the metrics live in
+module globals and aggregate across sessions. Instrumentation is off unless
+``INTERVIEWBOT_METRICS=1`` is set (or ``enable()`` is called); when off,
+``timer()`` hands back a shared no-op object and ``timed`` wrappers only pay
+for one flag check.
+"""
+import json
+import os
+import re
+import threading
+import time
+from functools import wraps
+
+ENABLED = os.environ.get("INTERVIEWBOT_METRICS", "").lower() in ("1", "true", "yes")
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_timers = {}
+_counters = {}
+_collectors = []
+
+
+def enable(flag=True):
+    global ENABLED
+    ENABLED = flag
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def record(stage, seconds):
+    """Add one duration sample for ``stage``."""
+    with _lock:
+        stats = _timers.get(stage)
+        if stats is None:
+            stats = _timers[stage] = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * len(BUCKETS)}
+        stats["count"] += 1
+        stats["sum"] += seconds
+        if seconds > stats["max"]:
+            stats["max"] = seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                stats["buckets"][i] += 1
+                break
+
+
+def incr(name, value=1, **labels):
+    """Increment a counter, optionally split by string labels."""
+    if not ENABLED:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def timer(stage):
+    """Context manager timing the enclosed block as ``stage``."""
+    return _Timer(stage) if ENABLED else _NULL_TIMER
+
+
+def timed(stage):
+    """Decorator timing every call of the wrapped function as ``stage``."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def register_collector(collector):
+    """Register a callable yielding ``(name, labels, value)`` gauges read at export time."""
+    _collectors.append(collector)
+
+
+def _collect_gauges():
+    gauges = []
+    for collector in list(_collectors):
+        gauges.extend(collector())
+    return gauges
+
+
+def snapshot():
+    """Return a JSON-serialisable copy of all timers and counters."""
+    with _lock:
+        timers = {
+            stage: {
+                "count": stats["count"],
+                "sum_seconds": stats["sum"],
+                "mean_ms": stats["sum"] / stats["count"] * 1000 if stats["count"] else 0.0,
+                "max_ms": stats["max"] * 1000,
+                "buckets": dict(zip([str(b) for b in BUCKETS], stats["buckets"])),
+            }
+            for stage, stats in _timers.items()
+        }
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in _counters.items()
+        ]
+    gauges = [{"name": name, "labels": labels, "value": value} for name, labels, value in _collect_gauges()]
+    return {"enabled": ENABLED, "timers": timers, "counters": counters, "gauges": gauges}
+
+
+def to_json():
+    return json.dumps(snapshot(), indent=2, sort_keys=True)
+
+
+def _metric_name(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_label_value(v)}"' for k, v in labels) + "}"
+
+
+def to_prometheus():
+    """Render all metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        if _timers:
+            lines.append("# HELP interviewbot_stage_duration_seconds Time spent per instrumented stage.")
+            lines.append("# TYPE interviewbot_stage_duration_seconds histogram")
+        for stage, stats in sorted(_timers.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, stats["buckets"]):
+                cumulative += count
+                lines.append(f'interviewbot_stage_duration_seconds_bucket{{stage="{_label_value(stage)}",le="{bound}"}} {cumulative}')
+            lines.append(f'interviewbot_stage_duration_seconds_bucket{{stage="{_label_value(stage)}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'interviewbot_stage_duration_seconds_sum{{stage="{_label_value(stage)}"}} {stats["sum"]}')
+            lines.append(f'interviewbot_stage_duration_seconds_count{{stage="{_label_value(stage)}"}} {stats["count"]}')
+
+        names = sorted({name for name, _ in _counters})
+        for name in names:
+            metric = f"interviewbot_{_metric_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_name, labels), value in sorted(_counters.items()):
+                if counter_name == name:
+                    lines.append(f"{metric}{_labels(labels)} {value}")
+
+    gauges = _collect_gauges()
+    for name in sorted({name for name, _, _ in gauges}):
+        metric = f"interviewbot_{_metric_name(name)}"
+        lines.append(f"# TYPE {metric} gauge")
+        for gauge_name, labels, value in gauges:
+            if gauge_name == name:
+                lines.append(f"{metric}{_labels(sorted(labels.items()))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+_server = None
+_server_failed = False
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serve ``/metrics`` (Prometheus) and ``/metrics.json`` from a daemon thread.
+
+    Only reachable from this machine unless another ``host`` (e.g. ``0.0.0.0``)
+    is given; the metrics are not authenticated.
+
+    Safe to call on every Streamlit rerun; only the first call starts a server.
+    If the port cannot be bound, that first call raises ``OSError`` and later
+    calls return None.
+    """
+    global _server, _server_failed
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    with _lock:
+        if _server is not None or _server_failed:
+            return _server
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = to_prometheus(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = to_json(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                payload = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer((host, port), Handler)
+        except OSError:
+            _server_failed = True
+            raise
+        threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
@@ -0,0 +1,784 @@
+import re
+import base64
+import hashlib
+import json
+import os
+import random
+
+import requests
+import streamlit as st
+
+import answer_index
+import instrumentation
+import llm_json
+import llm_limiter
+import question_bank
+import startup_artifact
+from skill_profile import ResumeLayout, SkillProfile
+
+try:
+    import PyPDF2
+except ImportError:
+    st.error("PyPDF2 is not installed. Please install it with: pip install PyPDF2")
+
+try:
+    import docx
+except ImportError:
+    st.error("python-docx is not installed. Please install it with: pip install python-docx")
+
+from fpdf import FPDF
+
+try:
+    import nltk
+    from nltk.tokenize import word_tokenize
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+    
+    # Only go to the network for data that is not installed yet; downloads fail
+    # quietly when offline, so check again afterwards
+    for resource, package in (('tokenizers/punkt', 'punkt'), ('corpora/stopwords', 'stopwords'), ('corpora/wordnet', 'wordnet')):
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            nltk.download(package, quiet=True)
+            nltk.data.find(resource)
+
+    NLP_ENABLED = True
+except (ImportError, LookupError) as e:
+    st.warning(f"NLTK not installed: {e}. NLP features will be disabled.")
+    NLP_ENABLED = False
+
+GEMINI_URL = os.environ.get(
+    "GEMINI_API_URL",
+    "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent",
+)
+# (connect, read) seconds; calls hold a shared limiter slot, so a hung connection must not hold it for long.
+# The read timeout is the longest gap between bytes, not the length of a streamed reply.
+GEMINI_TIMEOUT = (
+    float(os.environ.get("GEMINI_CONNECT_TIMEOUT", "5")),
+    float(os.environ.get("GEMINI_READ_TIMEOUT", "30")),
+)
+
+COMMON_SKILLS = {
+    'programming': ['python', 'java', 'javascript', 'html', 'css', 'c++', 'c#', 'ruby', 'php', 'sql', 'r'],
+    'frameworks': ['react', 'angular', 'vue', 'django', 'flask', 'spring', 'node.js', 'express', '.net'],
+    'databases': ['sql', 'mysql', 'postgresql', 'mongodb', 'oracle', 'sqlite', 'redis'],
+    'cloud': ['aws', 'azure', 'gcp', 'google cloud', 'docker', 'kubernetes'],
+    'tools': ['git', 'github', 'jira', 'jenkins', 'agile', 'scrum'],
+    'soft_skills': ['communication', 'leadership', 'teamwork', 'problem solving', 'time management'],
+}
+
+TECHNICAL_QUESTIONS = {
+    'python': [
+        {"question": "Explain how you would implement a decorator in Python.", 
+         "expected_keywords": ["function", "wrapper", "decorator", "@", "arguments", "return"]},
+        {"question": "How would you handle exceptions in Python?", 
+         "expected_keywords": ["try", "except", "finally", "raise", "error", "handling"]},
+        {"question": "Describe the difference between a list and a tuple in Python.", 
+         "expected_keywords": ["mutable", "immutable", "list", "tuple", "ordered", "elements"]}
+    ],
+    'java': [
+        {"question": "Explain the concept of inheritance in Java.", 
+         "expected_keywords": ["extends", "class", "parent", "child", "super", "override"]},
+        {"question": "How do you handle exceptions in Java?", 
+         "expected_keywords": ["try", "catch", "finally", "throw", "throws", "exception"]},
+        {"question": "What is the difference between an interface and an abstract class in Java?", 
+         "expected_keywords": ["implement", "extend", "methods", "abstract", "interface", "multiple"]}
+    ],
+    'javascript': [
+        {"question": "Explain closures in JavaScript.", 
+         "expected_keywords": ["function", "scope", "variable", "closure", "lexical", "access"]},
+        {"question": "How does asynchronous programming work in JavaScript?", 
+         "expected_keywords": ["promise", "async", "await", "callback", "then", "event loop"]},
+        {"question": "What's the difference between var, let, and const in JavaScript?", 
+         "expected_keywords": ["scope", "hoisting", "reassign", "block", "function", "declaration"]}
+    ],
+    'sql': [
+        {"question": "Explain the difference between INNER JOIN and LEFT JOIN.", 
+         "expected_keywords": ["inner", "left", "join", "matching", "all", "records"]},
+        {"question": "How would you optimize a slow SQL query?", 
+         "expected_keywords": ["index", "execution plan", "query", "optimize", "performance", "analyze"]},
+        {"question": "What is database normalization?", 
+         "expected_keywords": ["normal form", "redundancy", "dependency", "relation", "table", "normalize"]}
+    ],
+    'react': [
+        {"question": "Explain the component lifecycle in React.", 
+         "expected_keywords": ["mount", "update", "unmount", "render", "effect", "component"]},
+        {"question": "How do you manage state in React applications?", 
+         "expected_keywords": ["useState", "useReducer", "state", "props", "context", "Redux"]},
+        {"question": "What are hooks in React and why were they introduced?", 
+         "expected_keywords": ["hooks", "functional", "state", "effect", "rules", "useState"]}
+    ],
+    'aws': [
+        {"question": "Explain the difference between EC2 and Lambda.", 
+         "expected_keywords": ["instance", "serverless", "EC2", "Lambda", "scaling", "compute"]},
+        {"question": "How do you handle security in AWS?", 
+         "expected_keywords": ["IAM", "security group", "encryption", "access", "policy", "role"]},
+        {"question": "Describe the AWS services you've worked with.", 
+         "expected_keywords": ["S3", "EC2", "Lambda", "RDS", "CloudFront", "DynamoDB"]}
+    ],
+}
+
+GENERIC_QUESTIONS = [
+    {"question": "Tell me about a challenging project you worked on and how you overcame obstacles.", 
+     "expected_keywords": ["challenge", "project", "solution", "overcome", "team", "result"]},
+    {"question": "How do you approach learning new technologies?", 
+     "expected_keywords": ["learning", "research", "practice", "curiosity", "documentation", "projects"]},
+    {"question": "Describe your experience with agile development methodologies.", 
+     "expected_keywords": ["agile", "scrum", "sprint", "kanban", "standup", "retrospective"]},
+    {"question": "How do you ensure code quality in your projects?", 
+     "expected_keywords": ["testing", "review", "standards", "documentation", "refactoring", "clean"]}
+]
+
+# Stable ids for stored interviews and re-grading, derived from the question text
+for _skill, _questions in TECHNICAL_QUESTIONS.items():
+    for _question in _questions:
+        _question.setdefault("id", question_bank.question_id(_skill, _question["question"]))
+for _question in GENERIC_QUESTIONS:
+    _question.setdefault("id", question_bank.question_id(question_bank.GENERIC, _question["question"]))
+
+WELCOME_MESSAGES = [
+    "Welcome to TechInterviewBot! I'm here to help you practice your technical interview skills.",
+    "Hello! I'm your Technical Interview Assistant. Let's prepare you for your next tech interview.",
+    "Hi there! Ready to sharpen your technical interview skills? I'm here to help you practice.",
+    "Welcome aboard! I'm your AI interview coach. Let's see how well you can handle technical questions."
+]
+
+RESUME_PROMPTS = [
+    "To get started, please upload your resume or paste its content so I can tailor questions to your skills.",
+    "Let's begin by analyzing your resume. Please upload it or paste the text so I can customize the interview.",
+    "First, I'll need to see your resume to generate relevant questions. Upload a file or paste the text below.",
+    "To create a personalized interview experience, I need to review your resume first. Upload or paste it below."
+]
+
+SKILL_MESSAGES = [
+    "Great! I've analyzed your resume and identified these key skills:",
+    "Thanks for sharing your resume! Based on my analysis, here are the skills I've identified:",
+    "Perfect! After reviewing your resume, I've extracted these technical skills:",
+    "I've processed your resume and found these skills that we can focus on:"
+]
+
+INTERVIEW_START_MESSAGES = [
+    "Now let's begin the interview! I'll ask you a series of technical questions related to your skills.",
+    "Ready to start? I've prepared some technical questions based on your experience.",
+    "Let's dive into the technical interview! I'll ask questions related to your strongest skills.",
+    "The interview is about to begin! I'll evaluate your answers to help improve your skills."
+]
+
+QUESTION_TRANSITIONS = [
+    "Let's move on to the next question:",
+    "Here's another question for you:",
+    "Now, I'd like to ask you about:",
+    "Let's continue with this question:",
+    "For the next question:",
+    "Moving forward:",
+]
+
+EVALUATION_POSITIVE = [
+    "Great answer! You've covered the key points effectively.",
+    "Excellent response! Your understanding of the concept is clear.",
+    "Well done! Your explanation was thorough and accurate.",
+    "Very good! You demonstrated strong knowledge in this area."
+]
+
+EVALUATION_AVERAGE = [
+    "Good attempt! You covered some key points, but there's room for improvement.",
+    "That's a decent answer, but you could expand on a few concepts.",
+    "Not bad! You have the basic understanding, but consider adding more depth.",
+    "You're on the right track, but try to be more specific in your explanations."
+]
+
+EVALUATION_NEEDS_IMPROVEMENT = [
+    "You've made an attempt, but there are some key concepts missing.",
+    "Your answer needs more technical depth. Let me suggest some areas to focus on.",
+    "I see you have some understanding, but there are important points you didn't address.",
+    "This response could be improved by including more specific technical details."
+]
+
+def _lemmatize(text, stop_words):
+    tokens = word_tokenize(text.lower())
+    tokens = [token for token in tokens if token not in stop_words and token.isalnum()]
+    tokens = [_LEMMATIZER.lemmatize(token) for token in tokens]
+    return " ".join(tokens)
+
+@instrumentation.timed("preprocess_text")
+def preprocess_text(text):
+    if not NLP_ENABLED:
+        return text.lower()
+    return _lemmatize(text, STOP_WORDS)
+
+def preprocess_keyword(keyword, keywords=None):
+    """``preprocess_text`` for an expected keyword.
+
+    Served from ``keywords`` (a bank snapshot's table) or the startup tables
+    when known. Other keywords, e.g. of generated questions, are not cached.
+    """
+    for table in (keywords, _PROCESSED_KEYWORDS):
+        if table and keyword in table:
+            return table[keyword]
+    return preprocess_text(keyword)
+
+SKILL_ALIASES = {
+    'python': ['python'],
+    'java': ['java'],
+    'javascript': ['javascript'],
+    'sql': ['sql'],
+    'aws': ['aws'],
+    'react': ['react'],
+    'django': ['django'],
+    'flask': ['flask'],
+    'git': ['git'],
+    'github': ['github'],
+}
+
+CONTEXT_PATTERN = r'(?:skills|experience|proficient in|worked with|knowledge of|using|expertise in|developed with)'
+
+def skill_matcher_tables(common_skills, skill_aliases):
+    """Source of the one-pass matcher: ``(alias pattern, alias -> skill, skill -> categories)``."""
+    skill_categories = {}
+    alias_index = {}
+    for category, skill_list in common_skills.items():
+        for skill in skill_list:
+            skill_categories.setdefault(skill, set()).add(category)
+            for alias in skill_aliases.get(skill, [skill]):
+                alias_index[alias] = skill
+    # Longest aliases first so that e.g. 'google cloud' wins over a shorter alias at the same offset
+    alternation = "|".join(rf'\b{re.escape(alias)}\b' for alias in sorted(alias_index, key=len, reverse=True))
+    return alternation, alias_index, skill_categories
+
+def build_skill_matcher(common_skills, skill_aliases):
+    """Compile the one-pass matcher: ``(alias regex, alias -> skill, skill -> categories)``."""
+    pattern, alias_index, skill_categories = skill_matcher_tables(common_skills, skill_aliases)
+    return re.compile(pattern), alias_index, skill_categories
+
+_CONTEXT_RE = re.compile(CONTEXT_PATTERN)
+# A context keyword covers the rest of its sentence (possibly starting on the next line)
+_CONTEXT_TAIL_RE = re.compile(r'\s*[^.\n]*')
+
+def startup_fingerprint():
+    """Hash of everything the startup tables are derived from."""
+    return startup_artifact.fingerprint(
+        COMMON_SKILLS, SKILL_ALIASES, TECHNICAL_QUESTIONS, GENERIC_QUESTIONS, NLP_ENABLED,
+    )
+
+def build_startup_tables():
+    """Skill matcher, stopwords and lemmatized question keywords, built from scratch."""
+    pattern, alias_index, skill_categories = skill_matcher_tables(COMMON_SKILLS, SKILL_ALIASES)
+    stop_words = frozenset(stopwords.words('english')) if NLP_ENABLED else frozenset()
+    question_keywords = {}
+    for questions in list(TECHNICAL_QUESTIONS.values()) + [GENERIC_QUESTIONS]:
+        for q in questions:
+            for keyword in q["expected_keywords"]:
+                if keyword not in question_keywords:
+                    question_keywords[keyword] = _lemmatize(keyword, stop_words) if NLP_ENABLED else keyword.lower()
+    return {
+        "skill_pattern": pattern,
+        "alias_index": alias_index,
+        "skill_categories": skill_categories,
+        "stopwords": stop_words,
+        "question_keywords": question_keywords,
+    }
+
+def load_startup_tables(path=startup_artifact.DEFAULT_PATH):
+    """Return ``(tables, source)``: the precompiled artifact, or tables built here if it is unusable."""
+    with instrumentation.timer("startup_tables"):
+        try:
+            tables = startup_artifact.read(path, startup_fingerprint())
+            instrumentation.incr("startup_artifact", outcome="loaded")
+            return tables, "artifact"
+        except startup_artifact.ArtifactError as e:
+            instrumentation.incr("startup_artifact", outcome="rebuilt")
+            return build_startup_tables(), f"built at startup ({e})"
+
+def install_startup_tables(tables):
+    global _SKILL_RE, SKILL_ALIAS_INDEX, SKILL_CATEGORIES, STOP_WORDS, _PROCESSED_KEYWORDS
+    _SKILL_RE = re.compile(tables["skill_pattern"])
+    SKILL_ALIAS_INDEX = tables["alias_index"]
+    # The artifact stores sets as lists
+    SKILL_CATEGORIES = {skill: set(categories) for skill, categories in tables["skill_categories"].items()}
+    STOP_WORDS = frozenset(tables["stopwords"])
+    _PROCESSED_KEYWORDS = dict(tables["question_keywords"])
+
+_LEMMATIZER = WordNetLemmatizer() if NLP_ENABLED else None
+STARTUP_TABLES, STARTUP_TABLES_SOURCE = load_startup_tables()
+install_startup_tables(STARTUP_TABLES)
+
+# The built-in questions above, overridden by files in INTERVIEWBOT_QUESTIONS_DIR and reloaded when they change
+QUESTION_BANK = question_bank.QuestionBank(
+    question_bank.QUESTIONS_DIR, TECHNICAL_QUESTIONS, GENERIC_QUESTIONS, preprocess_keyword,
+).start()
+
+def _context_spans(raw_text):
+    """Merged ``(start, end)`` ranges in which a skill mention may start."""
+    spans = []
+    for match in _CONTEXT_RE.finditer(raw_text):
+        end = _CONTEXT_TAIL_RE.match(raw_text, match.end()).end()
+        if spans and match.start() <= spans[-1][1]:
+            if end > spans[-1][1]:
+                spans[-1][1] = end
+        else:
+            spans.append([match.start(), end])
+    return spans
+
+@instrumentation.timed("extract_skill_profile")
+def extract_skill_profile(text, debug_matches=None):
+    """Scan the resume once and return a SkillProfile with per-skill evidence.
+
+    A skill only counts when it appears after a context keyword (skills,
+    experience, worked with, ...) in the same sentence.
+    """
+    raw_text = text.lower()
+    layout = ResumeLayout(raw_text)
+    profile = SkillProfile()
+    for start, end in _context_spans(raw_text):
+        section, section_start = layout.section_at(start)
+        year = layout.year_near(section_start, end)
+        # A skill may start anywhere up to the end of the span and run past it ('node.js')
+        for match in _SKILL_RE.finditer(raw_text, start):
+            if match.start() > end:
+                break
+            skill = SKILL_ALIAS_INDEX[match.group()]
+            profile.add(skill, SKILL_CATEGORIES[skill], match.start(), section, year)
+            if debug_matches is not None:
+                debug_matches.append(f"Matched '{skill}' in: '{raw_text[start:end]}'")
+    return profile
+
+def extract_skills_with_nlp(text, profile=None):
+    """Extract skills with very strict context-based matching.
+
+    When ``profile`` is given, the evidence found is merged into it.
+    """
+    if not NLP_ENABLED:
+        return extract_skills_basic(text, profile)
+    
+    debug_matches = []
+    found = extract_skill_profile(text, debug_matches)
+    if profile is not None:
+        profile.merge(found)
+    st.session_state.debug_skills = debug_matches
+    st.session_state.raw_resume_text = text.lower()  # Store raw text for debugging
+    return found.to_skills_dict()
+
+def extract_skills_basic(text, profile=None):
+    """Basic skill extraction with strict context."""
+    found = extract_skill_profile(text)
+    if profile is not None:
+        profile.merge(found)
+    return found.to_skills_dict()
+
+@instrumentation.timed("extract_skills")
+def extract_skills(text, profile=None):
+    if not text:
+        return {}
+    return extract_skills_with_nlp(text, profile) if NLP_ENABLED else extract_skills_basic(text, profile)
+
+def evaluate_answer_with_nlp(question, answer, expected_keywords, keywords=None):
+    if not answer.strip():
+        return {"score": 0, "feedback": "No answer provided.", "missing_concepts": expected_keywords}
+    
+    if not NLP_ENABLED:
+        keyword_count = sum(1 for keyword in expected_keywords if keyword.lower() in answer.lower())
+        score = min(keyword_count / len(expected_keywords), 1.0) * 100
+        missing = [k for k in expected_keywords if k.lower() not in answer.lower()]
+        return {"score": score, "feedback": "Basic keyword matching applied.", "missing_concepts": missing}
+    
+    processed_answer = preprocess_text(answer)
+    processed_keywords = [preprocess_keyword(kw, keywords) for kw in expected_keywords]
+    keyword_count = sum(1 for kw in processed_keywords if kw in processed_answer)
+    score = min(keyword_count / len(expected_keywords), 1.0) * 100
+    missing = [kw for kw, processed in zip(expected_keywords, processed_keywords) if processed not in processed_answer]
+    
+    feedback = get_feedback_message(score)
+    if missing:
+        feedback += f" Consider mentioning: {', '.join(missing[:3])}."
+    
+    return {"score": score, "feedback": feedback, "missing_concepts": missing}
+
+def get_gemini_api_key():
+    """Return the Gemini key from the environment, falling back to Streamlit secrets."""
+    api_key = os.environ.get("GEMINI_API_KEY", "")
+    if api_key:
+        return api_key
+    try:
+        return st.secrets.get("GEMINI_API_KEY", "")
+    except Exception:
+        # No secrets.toml (e.g. offline benchmarks or CLI tools)
+        return ""
+
+GRADING_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "score": {"type": "INTEGER"},
+        "feedback": {"type": "STRING"},
+        "missing_concepts": {"type": "ARRAY", "items": {"type": "STRING"}},
+    },
+    "required": ["score", "feedback", "missing_concepts"],
+}
+
+REASK_PROMPT = 'Your previous reply was not valid JSON. Reply again with only a JSON object with keys "score", "feedback" and "missing_concepts".'
+
+# Follow-up requests allowed when a reply cannot be parsed as JSON
+MAX_REASKS = int(os.environ.get("GEMINI_MAX_REASKS", "1"))
+
+def build_grading_prompt(question, answer, expected_keywords):
+    return f"""
+    Question: {question}
+    Candidate's Answer: {answer}
+    Expected keywords or concepts: {', '.join(expected_keywords)}
+    Evaluate this answer based on the following criteria:
+    1. Presence of expected keywords/concepts
+    2. Technical accuracy
+    3. Clarity of explanation
+    Provide:
+    1. A score out of 100
+    2. Brief feedback (2-3 sentences)
+    3. List of any missing important concepts
+    Format as JSON with keys: "score", "feedback", "missing_concepts"
+    """
+
+SEED_PROMPT = """
+    A very similar answer to this question was graded before (similarity {similarity:.0%}):
+    Previous answer: {answer}
+    Previous grade: {grade}
+    Keep your grade consistent with it unless the differences matter.
+    """
+
+# Stored with every grade; changes whenever the grading prompt or schema does
+PROMPT_VERSION = hashlib.sha256(json.dumps(
+    [build_grading_prompt("{question}", "{answer}", ["{keywords}"]), REASK_PROMPT, SEED_PROMPT, GRADING_SCHEMA],
+    sort_keys=True,
+).encode()).hexdigest()[:12]
+
+def keywords_fingerprint(expected_keywords):
+    return hashlib.sha256("\x1f".join(expected_keywords).encode()).hexdigest()[:12]
+
+def _response_text(response_data):
+    """Concatenate the text parts of one generateContent response (or stream chunk)."""
+    try:
+        parts = response_data["candidates"][0]["content"]["parts"]
+    except (KeyError, IndexError, TypeError):
+        return ""
+    return "".join(part.get("text", "") for part in parts)
+
+def generate_gemini_json(api_key, contents, schema, priority=llm_limiter.PRIORITY_LIVE, on_partial=None):
+    """Call Gemini in JSON mode and return ``(parsed_object_or_None, raw_text)``.
+
+    With ``on_partial`` the reply is streamed and the callback receives the
+    growing ``StreamingJSONParser`` as chunks arrive.
+    """
+    headers = {"Content-Type": "application/json", "x-goog-api-key": api_key}
+    data = {
+        "contents": contents,
+        "generationConfig": {"responseMimeType": "application/json", "responseSchema": schema},
+    }
+    url = GEMINI_URL
+    if on_partial is not None:
+        url = url.replace(":generateContent", ":streamGenerateContent") + "?alt=sse"
+    parser = llm_json.StreamingJSONParser()
+    limiter = llm_limiter.get_limiter(api_key)
+    with limiter.slot(priority), instrumentation.timer("gemini_request"):
+        with requests.post(
+            url, headers=headers, json=data, stream=on_partial is not None, timeout=GEMINI_TIMEOUT,
+        ) as response:
+            instrumentation.incr("gemini_responses", status=response.status_code)
+            if response.status_code == 429:
+                limiter.throttled(llm_limiter.parse_retry_after(response.headers.get("Retry-After")))
+            response.raise_for_status()
+            if on_partial is None:
+                parser.feed(_response_text(response.json()))
+            else:
+                # text/event-stream has no charset, which requests would decode as ISO-8859-1
+                response.encoding = "utf-8"
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    try:
+                        chunk = json.loads(line[len("data:"):])
+                    except ValueError:
+                        continue
+                    parser.feed(_response_text(chunk))
+                    on_partial(parser)
+    return parser.result or llm_json.extract_json_object(parser.text), parser.text
+
+def _normalize_grade(result):
+    try:
+        score = max(0, min(100, round(float(result.get("score", 50)))))
+    except (TypeError, ValueError):
+        score = 50
+    missing = result.get("missing_concepts", [])
+    if isinstance(missing, str):
+        missing = [missing]
+    return {
+        "score": score,
+        "feedback": result.get("feedback") or "No specific feedback provided.",
+        "missing_concepts": [str(concept) for concept in missing or []],
+    }
+
+def grade_answer_with_gemini(api_key, question, answer, expected_keywords, priority=llm_limiter.PRIORITY_LIVE, on_partial=None, seed=None, keywords=None):
+    """Grade an answer with Gemini only and return ``(grade, parse_outcome)``.
+
+    ``seed`` is a near-duplicate ``answer_index.Match`` to show the model as a
+    reference. ``keywords`` is the session's bank snapshot keyword table.
+    Raises when Gemini gives no usable grade.
+    """
+    prompt = build_grading_prompt(question, answer, expected_keywords)
+    if seed is not None:
+        prompt += SEED_PROMPT.format(similarity=seed.similarity, answer=seed.answer, grade=json.dumps(seed.grade))
+    contents = [{"role": "user", "parts": [{"text": prompt}]}]
+    for attempt in range(MAX_REASKS + 1):
+        result, text = generate_gemini_json(api_key, contents, GRADING_SCHEMA, priority, on_partial)
+        if result is not None:
+            outcome = "direct" if attempt == 0 else "reask"
+            instrumentation.incr("gemini_json_parse", outcome=outcome)
+            return _normalize_grade(result), outcome
+        # Ask the model to repair its own reply rather than discarding it
+        contents = contents + [
+            {"role": "model", "parts": [{"text": text}]},
+            {"role": "user", "parts": [{"text": REASK_PROMPT}]},
+        ]
+
+    # Still no complete object: keep whatever fields were fully generated
+    score = llm_json.partial_number_field(text, "score")
+    if score is not None:
+        instrumentation.incr("gemini_json_parse", outcome="salvaged")
+        fallback = evaluate_answer_with_nlp(question, answer, expected_keywords, keywords)
+        return _normalize_grade({
+            "score": score,
+            "feedback": llm_json.partial_string_field(text, "feedback") or fallback["feedback"],
+            "missing_concepts": fallback["missing_concepts"],
+        }), "salvaged"
+    instrumentation.incr("gemini_json_parse", outcome="failed")
+    raise ValueError("Gemini reply did not contain a JSON object")
+
+def _worth_retrying(error, api_key):
+    """True for a 429 whose Retry-After fits within the limiter's ``max_wait_seconds``."""
+    response = getattr(error, "response", None)
+    if response is None or response.status_code != 429:
+        return False
+    retry_after = llm_limiter.parse_retry_after(response.headers.get("Retry-After"))
+    return retry_after is None or retry_after <= llm_limiter.get_limiter(api_key).limits["max_wait_seconds"]
+
+@instrumentation.timed("validate_answer_with_gemini")
+def validate_answer_with_gemini(question, answer, expected_keywords, priority=llm_limiter.PRIORITY_LIVE, on_feedback=None, keywords=None):
+    """Grade an answer with Gemini, falling back to NLP scoring on failure.
+
+    ``on_feedback`` is called with the feedback text as it streams in.
+    ``keywords`` is the preprocessed keyword table of the session's bank snapshot.
+    """
+    api_key = get_gemini_api_key()
+    if not api_key:
+        instrumentation.incr("gemini_fallbacks", reason="no_api_key")
+        return dict(evaluate_answer_with_nlp(question, answer, expected_keywords, keywords), grader="nlp")
+
+    on_partial = None
+    if on_feedback is not None:
+        def on_partial(parser):
+            feedback = parser.partial("feedback")
+            if feedback:
+                on_feedback(feedback)
+
+    duplicate = answer_index.find_duplicate(question, expected_keywords, answer, PROMPT_VERSION)
+    if duplicate is not None and duplicate.similarity >= answer_index.REUSE_THRESHOLD:
+        instrumentation.incr("answer_duplicates", action="reused")
+        answer_index.get_index().flag(duplicate, question, answer, "reused")
+        grade = dict(duplicate.grade, duplicate_of=duplicate.entry_id, similarity=round(duplicate.similarity, 3))
+        if on_feedback is not None:
+            on_feedback(grade["feedback"])
+        return grade
+
+    for attempt in range(2):
+        try:
+            grade, outcome = grade_answer_with_gemini(
+                api_key, question, answer, expected_keywords, priority, on_partial, duplicate, keywords,
+            )
+            break
+        except Exception as e:
+            if attempt == 0 and _worth_retrying(e, api_key):
+                # The limiter is paused until Retry-After; the retry waits for it in the queue
+                instrumentation.incr("gemini_retries", reason="throttled")
+                continue
+            instrumentation.incr("gemini_fallbacks", reason=type(e).__name__)
+            st.error(f"Error calling Gemini API: {str(e)}")
+            return dict(evaluate_answer_with_nlp(question, answer, expected_keywords, keywords), grader="nlp")
+    if outcome != "salvaged":
+        answer_index.record_grade(question, expected_keywords, answer, grade, PROMPT_VERSION)
+    if duplicate is not None:
+        instrumentation.incr("answer_duplicates", action="seeded")
+        answer_index.get_index().flag(duplicate, question, answer, "seeded")
+        grade = dict(grade, duplicate_of=duplicate.entry_id, similarity=round(duplicate.similarity, 3))
+    return grade
+
+@instrumentation.timed("extract_text_from_pdf")
+def extract_text_from_pdf(pdf_file):
+    try:
+        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        text = ""
+        for page in pdf_reader.pages:
+            text += page.extract_text() or ""
+        return text
+    except Exception as e:
+        st.error(f"Error processing PDF: {e}")
+        return ""
+
+@instrumentation.timed("extract_text_from_docx")
+def extract_text_from_docx(docx_file):
+    try:
+        doc = docx.Document(docx_file)
+        text = ""
+        for paragraph in doc.paragraphs:
+            text += paragraph.text + "\n"
+        return text
+    except Exception as e:
+        st.error(f"Error processing DOCX: {e}")
+        return ""
+
+def generate_technical_questions(skills, max_questions=7, profile=None, bank=None):
+    """Pick questions for the candidate's skills, strongest evidence first.
+
+    With a SkillProfile the skills are ranked by mention counts, section and
+    recency; without one, by how many categories list them. ``bank`` is the
+    session's pinned question bank snapshot (default: the current one).
+    """
+    bank = bank or QUESTION_BANK.current()
+    all_possible_questions = []
+    if profile:
+        sorted_skills = profile.ranked_skills()
+    else:
+        skill_frequency = {}
+        for skill_list in skills.values():
+            for skill in skill_list:
+                skill_frequency[skill] = skill_frequency.get(skill, 0) + 1
+        sorted_skills = sorted(skill_frequency, key=skill_frequency.get, reverse=True)
+    
+    for skill in sorted_skills:
+        if skill in bank.technical:
+            all_possible_questions.extend(bank.technical[skill])
+    
+    # Snapshots are shared by all sessions, so shuffle a copy
+    generic_questions = random.sample(bank.generic, len(bank.generic))
+    if len(all_possible_questions) < max_questions:
+        all_possible_questions.extend(generic_questions)
+    
+    unique_questions = []
+    question_texts = set()
+    for q in all_possible_questions:
+        if q["question"] not in question_texts:
+            unique_questions.append(q)
+            question_texts.add(q["question"])
+            if len(unique_questions) >= max_questions:
+                break
+    
+    if len(unique_questions) < max_questions:
+        for q in generic_questions:
+            if q["question"] not in question_texts:
+                unique_questions.append(q)
+                question_texts.add(q["question"])
+                if len(unique_questions) >= max_questions:
+                    break
+    
+    return unique_questions[:max_questions]
+
+def get_download_link(text, filename, label="Download"):
+    b64 = base64.b64encode(text.encode()).decode()
+    return f'<a href="data:file/txt;base64,{b64}" download="{filename}">{label}</a>'
+
+def get_feedback_message(score):
+    if score >= 80:
+        return random.choice(EVALUATION_POSITIVE)
+    elif score >= 60:
+        return random.choice(EVALUATION_AVERAGE)
+    else:
+        return random.choice(EVALUATION_NEEDS_IMPROVEMENT)
+
+def format_skills_message(skills):
+    message = ""
+    for category, skill_list in skills.items():
+        message += f"**{category.capitalize()}**: {', '.join(skill_list)}\n"
+    return message
+
+@instrumentation.timed("export_results_as_pdf")
+def export_results_as_pdf(candidate_name, interview_date, avg_score, rating, skills, evaluations, questions, output_path="interview_results.pdf"):
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, "Technical Interview Results", ln=True, align="C")
+    pdf.ln(5)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 10, f"Candidate: {candidate_name}", ln=True)
+    pdf.cell(0, 10, f"Date: {interview_date}", ln=True)
+    pdf.ln(5)
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 10, "Summary", ln=True)
+    pdf.set_font("Arial", "", 12)
+    pdf.cell(0, 10, f"Overall Score: {avg_score:.1f}/100", ln=True)
+    pdf.cell(0, 10, f"Rating: {rating}", ln=True)
+    pdf.ln(5)
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 10, "Skills", ln=True)
+    pdf.set_font("Arial", "", 12)
+    for category, skill_list in skills.items():
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(0, 10, f"{category.capitalize()}", ln=True)
+        pdf.set_font("Arial", "", 12)
+        pdf.multi_cell(0, 10, ", ".join(skill_list))
+    pdf.ln(5)
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 10, "Interview Questions and Evaluations", ln=True)
+    for i, q in enumerate(questions):
+        if q['question'] in evaluations:
+            data = evaluations[q['question']]
+            evaluation = data["evaluation"]
+            pdf.set_font("Arial", "B", 12)
+            pdf.cell(0, 10, f"Question {i+1}: {q['question']}", ln=True)
+            pdf.set_font("Arial", "", 12)
+            pdf.multi_cell(0, 10, f"Answer: {data['answer']}")
+            pdf.set_font("Arial", "B", 12)
+            pdf.cell(0, 10, f"Score: {evaluation.get('score', 'N/A')}/100", ln=True)
+            pdf.set_font("Arial", "", 12)
+            pdf.multi_cell(0, 10, f"Feedback: {evaluation.get('feedback', 'No feedback available')}")
+            missing = evaluation.get('missing_concepts', [])
+            if missing:
+                pdf.set_font("Arial", "B", 12)
+                pdf.cell(0, 10, "Missing concepts:", ln=True)
+                pdf.set_font("Arial", "", 12)
+                for concept in missing:
+                    pdf.cell(0, 10, f"- {concept}", ln=True)
+            pdf.ln(5)
+    pdf.output(output_path)
+    return output_path
+
+@instrumentation.timed("generate_interview_summary")
+def generate_interview_summary(candidate_name, interview_date, avg_score, rating, skills, evaluations, questions):
+    summary = []
+    summary.append(f"# Technical Interview Results for {candidate_name}")
+    summary.append(f"**Date:** {interview_date}")
+    summary.append(f"**Overall Score:** {avg_score:.1f}/100")
+    summary.append(f"**Rating:** {rating}")
+    summary.append("\n## Skills Profile")
+    for category, skill_list in skills.items():
+        summary.append(f"**{category.capitalize()}:** {', '.join(skill_list)}")
+    summary.append("\n## Question Analysis")
+    for i, q in enumerate(questions):
+        if q['question'] in evaluations:
+            data = evaluations[q['question']]
+            evaluation = data["evaluation"]
+            score = evaluation.get('score', 0)
+            summary.append(f"### Question {i+1}: {q['question']}")
+            summary.append(f"**Score:** {score}/100")
+            summary.append(f"**Feedback:** {evaluation.get('feedback', 'No feedback available')}")
+            missing = evaluation.get('missing_concepts', [])
+            if missing:
+                summary.append("**Areas for improvement:**")
+                for concept in missing:
+                    summary.append(f"- {concept}")
+            summary.append("")
+    summary.append("## Interview Recommendation")
+    if avg_score >= 85:
+        summary.append("Based on your technical interview performance, you demonstrate strong technical knowledge and communication skills.")
+    elif avg_score >= 70:
+        summary.append("Your technical skills are solid, with some areas that could benefit from deeper understanding.")
+    elif avg_score >= 50:
+        summary.append("You have a good foundation of technical knowledge, but should continue to build your expertise.")
+    else:
+        summary.append("Consider spending more time studying the fundamentals of your technical areas.")
+    return "\n".join(summary)
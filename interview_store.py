@@ -0,0 +1,103 @@
+"""Completed interviews, kept for re-grading and analytics.
+
+Storage is off unless ``INTERVIEWBOT_STORE_INTERVIEWS=1``. Each finished
+interview is then appended as one JSON line to ``interviews.jsonl`` in
+``INTERVIEWBOT_DATA_DIR`` (default ``data``). Every answered question
+carries the question id, the keywords it was graded against and the grading
+prompt version, so ``regrade.py`` can tell which grades are out of date.
+
+Records hold the candidate's name and answers in plain text and are kept
+until the operator deletes the file; nothing expires on its own.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+ENABLED = os.environ.get("INTERVIEWBOT_STORE_INTERVIEWS", "").lower() in ("1", "true", "yes")
+DATA_DIR = os.environ.get("INTERVIEWBOT_DATA_DIR", "data")
+
+_write_lock = threading.Lock()
+
+
+def default_path():
+    return os.path.join(DATA_DIR, "interviews.jsonl")
+
+
+def interview_record(session_id, candidate_name, interview_date, skills, questions, evaluations, bank=None):
+    """Build the stored form of one interview from the session's state.
+
+    ``bank`` is the question bank snapshot the session was pinned to.
+    """
+    from interview_core import PROMPT_VERSION, keywords_fingerprint
+
+    items = []
+    for q in questions:
+        data = evaluations.get(q["question"])
+        if data is None:
+            continue
+        evaluation = data["evaluation"]
+        grader = evaluation.get("grader", "gemini")
+        items.append({
+            "question_id": q.get("id"),
+            "skill": q.get("skill"),
+            # Only generated questions have one
+            "difficulty": q.get("difficulty"),
+            "question": q["question"],
+            "expected_keywords": list(q["expected_keywords"]),
+            "keywords_fingerprint": keywords_fingerprint(q["expected_keywords"]),
+            "answer": data["answer"],
+            "score": evaluation.get("score", 0),
+            "feedback": evaluation.get("feedback", ""),
+            "missing_concepts": list(evaluation.get("missing_concepts", [])),
+            "grader": grader,
+            # NLP fallback grades never used the prompt
+            "prompt_version": PROMPT_VERSION if grader == "gemini" else None,
+            "duplicate_of": evaluation.get("duplicate_of"),
+            "answer_seconds": data.get("answer_seconds"),
+            "grade_ms": data.get("grade_ms"),
+        })
+    return {
+        "interview_id": f"{session_id}-{uuid.uuid4().hex[:8]}",
+        "session_id": session_id,
+        "candidate_name": candidate_name,
+        "interview_date": interview_date,
+        "completed_at": time.time(),
+        "skills": skills,
+        "question_bank": {"version": bank.version, "fingerprint": bank.fingerprint} if bank is not None else None,
+        "items": items,
+    }
+
+
+def save_interview(record, path=None):
+    """Append one interview record; a no-op when storage is disabled."""
+    if not ENABLED:
+        return None
+    path = path or default_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = json.dumps(record) + "\n"
+    with _write_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+    return record["interview_id"]
+
+
+def iter_interviews(path=None):
+    """Stream stored interviews one at a time, skipping a torn last line."""
+    try:
+        f = open(path or default_path(), encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def iter_items(path=None):
+    """Stream ``(interview, item)`` pairs for every graded answer."""
+    for interview in iter_interviews(path):
+        for item in interview.get("items", []):
+            yield interview, item
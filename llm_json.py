@@ -0,0 +1,114 @@
+"""Tolerant JSON extraction for LLM replies.
+
+Gemini usually returns bare JSON when asked for ``application/json``, but
+older prompts, other models and truncated streams give fenced blocks, prose
+around the object or a half-written object. These helpers get the most out of
+whatever arrived instead of discarding the reply.
+"""
+import json
+import re
+
+_decoder = json.JSONDecoder()
+
+
+def extract_json_object(text):
+    """Return the first JSON object embedded in ``text``, or None."""
+    start = text.find("{")
+    while start != -1:
+        try:
+            value, _ = _decoder.raw_decode(text, start)
+        except ValueError:
+            start = text.find("{", start + 1)
+            continue
+        if isinstance(value, dict):
+            return value
+        start = text.find("{", start + 1)
+    return None
+
+
+def _decode_partial_string(raw):
+    """Decode the body of a JSON string that may be cut off mid-escape."""
+    # Drop an unfinished escape sequence at the end
+    raw = re.sub(r"\\(u[0-9a-fA-F]{0,3})?$", "", raw)
+    try:
+        return json.loads(f'"{raw}"')
+    except ValueError:
+        return raw
+
+
+def partial_string_field(text, field):
+    """Return the (possibly unfinished) value of a string field, or None."""
+    match = re.search(rf'"{re.escape(field)}"\s*:\s*"((?:[^"\\]|\\.)*\\?)', text, re.S)
+    if not match:
+        return None
+    return _decode_partial_string(match.group(1))
+
+
+def partial_number_field(text, field):
+    """Return a complete numeric field value from partial JSON, or None."""
+    match = re.search(rf'"{re.escape(field)}"\s*:\s*(-?\d+(?:\.\d+)?)\s*[,}}\n]', text)
+    if not match:
+        return None
+    value = float(match.group(1))
+    return int(value) if value.is_integer() else value
+
+
+class StreamingJSONParser:
+    """Incrementally finds the first complete JSON object in streamed text.
+
+    ``feed`` is O(len(chunk)): braces are tracked outside string literals and
+    ``json.loads`` only runs when a top-level object closes.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.result = None
+        self._scanned = 0
+        self._depth = 0
+        self._start = None
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk):
+        """Add streamed text; returns the parsed object once one is complete."""
+        if self.result is not None:
+            self.text += chunk
+            return self.result
+        self.text += chunk
+        text = self.text
+        for i in range(self._scanned, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                if self._depth:
+                    self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch == "}" and self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        value = json.loads(text[self._start:i + 1])
+                    except ValueError:
+                        value = None
+                    if isinstance(value, dict):
+                        self._scanned = i + 1
+                        self.result = value
+                        return value
+        self._scanned = len(text)
+        return None
+
+    def partial(self, field):
+        """Best-effort value of a string field before the object is complete."""
+        if self.result is not None:
+            value = self.result.get(field)
+            return value if isinstance(value, str) else None
+        return partial_string_field(self.text, field)
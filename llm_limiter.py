@@ -0,0 +1,224 @@
+"""Process-wide rate limiting and concurrency control for Gemini calls.
+
+Every Streamlit session runs in the same process, so one limiter per API key
+is shared by all of them. A call first waits in a priority queue (live
+interviews before batch re-grades), then for a free concurrency slot and a
+token from the key's token bucket.
+
+Limits come from ``GEMINI_RATE_LIMITS``, a JSON object keyed by ``"default"``
+or by the key id shown in the metrics panel (the first 12 hex digits of the
+key's SHA-256), e.g.::
+
+    GEMINI_RATE_LIMITS='{"default": {"requests_per_minute": 60, "burst": 10,
+                        "max_concurrency": 4, "max_wait_seconds": 30}}'
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import instrumentation
+
+PRIORITY_LIVE = 0
+# Speculative work for live sessions (question generation): after grading, before batch jobs
+PRIORITY_PREFETCH = 5
+PRIORITY_BATCH = 10
+
+PRIORITY_NAMES = {PRIORITY_LIVE: "live", PRIORITY_PREFETCH: "prefetch", PRIORITY_BATCH: "batch"}
+
+DEFAULT_LIMITS = {
+    "requests_per_minute": 60,
+    "burst": 10,
+    "max_concurrency": 4,
+    "max_wait_seconds": 30,
+}
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a call waited longer than ``max_wait_seconds`` for its turn."""
+
+
+def key_id(api_key):
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+def parse_retry_after(value, now=None):
+    """Seconds from a ``Retry-After`` header (delay seconds or an HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        return max(seconds, 0.0) if math.isfinite(seconds) else None
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max((when - now).total_seconds(), 0.0)
+
+
+def load_limits(key):
+    """Return the limits for a key id, merged over the defaults."""
+    try:
+        configured = json.loads(os.environ.get("GEMINI_RATE_LIMITS", "") or "{}")
+    except ValueError:
+        configured = {}
+    limits = dict(DEFAULT_LIMITS)
+    limits.update(configured.get("default", {}))
+    limits.update(configured.get(key, {}))
+    return limits
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second, capacity):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until one token is available (0 if one is available now)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self):
+        self.tokens -= 1
+
+    def pause(self, seconds, now):
+        """Empty the bucket so the next token is only available after ``seconds``."""
+        self._refill(now)
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class GeminiLimiter:
+    def __init__(self, name, limits):
+        self.name = name
+        self.limits = limits
+        self.bucket = TokenBucket(limits["requests_per_minute"] / 60.0, limits["burst"])
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._stats = {"acquired": 0, "timeouts": 0, "throttled": 0, "wait_total": 0.0, "wait_max": 0.0}
+
+    @contextmanager
+    def slot(self, priority=PRIORITY_LIVE, max_wait=None):
+        """Hold one concurrency slot (and one rate-limit token) for the enclosed call."""
+        max_wait = self.limits["max_wait_seconds"] if max_wait is None else max_wait
+        ticket = (priority, next(self._seq))
+        start = time.monotonic()
+        deadline = start + max_wait
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    timeout = deadline - now
+                    if self._queue[0] == ticket and self._in_flight < self.limits["max_concurrency"]:
+                        token_wait = self.bucket.wait_time(now)
+                        if token_wait == 0:
+                            break
+                        timeout = min(timeout, token_wait)
+                    if deadline - now <= 0:
+                        self._stats["timeouts"] += 1
+                        instrumentation.incr("gemini_limiter_timeouts", priority=PRIORITY_NAMES.get(priority, priority))
+                        raise RateLimitTimeout(f"waited more than {max_wait}s for a Gemini slot")
+                    self._cond.wait(timeout)
+            except BaseException:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._queue)
+            self.bucket.take()
+            self._in_flight += 1
+            waited = time.monotonic() - start
+            self._stats["acquired"] += 1
+            self._stats["wait_total"] += waited
+            self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+            # The next ticket may be able to go too
+            self._cond.notify_all()
+        if instrumentation.ENABLED:
+            instrumentation.record(f"gemini_queue_wait.{PRIORITY_NAMES.get(priority, priority)}", waited)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def throttled(self, retry_after=None):
+        """Back off after the provider answered 429."""
+        with self._cond:
+            self._stats["throttled"] += 1
+            self.bucket.pause(retry_after or 60.0 / max(self.limits["requests_per_minute"], 1), time.monotonic())
+        instrumentation.incr("gemini_throttled")
+
+    def stats(self):
+        with self._cond:
+            acquired = self._stats["acquired"]
+            return {
+                "key_id": self.name,
+                "queue_depth": len(self._queue),
+                "in_flight": self._in_flight,
+                "acquired": acquired,
+                "timeouts": self._stats["timeouts"],
+                "throttled": self._stats["throttled"],
+                "mean_wait_ms": self._stats["wait_total"] / acquired * 1000 if acquired else 0.0,
+                "max_wait_ms": self._stats["wait_max"] * 1000,
+            }
+
+
+_registry_lock = threading.Lock()
+_limiters = {}
+
+
+def get_limiter(api_key):
+    key = key_id(api_key)
+    with _registry_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = GeminiLimiter(key, load_limits(key))
+        return limiter
+
+
+def configure(api_key, **limits):
+    """Replace a key's limiter with one whose limits are overridden, e.g. for a batch job."""
+    key = key_id(api_key)
+    with _registry_lock:
+        limiter = _limiters[key] = GeminiLimiter(key, dict(load_limits(key), **limits))
+    return limiter
+
+
+def all_stats():
+    with _registry_lock:
+        limiters = list(_limiters.values())
+    return [limiter.stats() for limiter in limiters]
+
+
+def _gauges():
+    for stats in all_stats():
+        labels = {"key_id": stats["key_id"]}
+        yield "gemini_queue_depth", labels, stats["queue_depth"]
+        yield "gemini_in_flight", labels, stats["in_flight"]
+
+
+instrumentation.register_collector(_gauges)
@@ -0,0 +1,198 @@
+"""Opt-in profiling of slow interview turns.
+
+Turned on for the whole process with ``INTERVIEWBOT_PROFILE=1``. The
+``?profile=1`` query parameter profiles every turn of one browser session; the
+app honours it only with ``INTERVIEWBOT_PROFILE=1`` or ``INTERVIEWBOT_ADMIN=1``.
+Otherwise only a fraction of
+turns (``INTERVIEWBOT_PROFILE_SAMPLE_RATE``) is profiled, and a profile is
+only written when the turn took longer than
+``INTERVIEWBOT_PROFILE_THRESHOLD_MS``.
+
+Two modes are available through ``INTERVIEWBOT_PROFILE_MODE``:
+
+* ``sample`` (default): a background thread snapshots the turn's stack every
+  ``INTERVIEWBOT_PROFILE_INTERVAL_MS`` and writes collapsed stacks
+  (``.folded``, readable by flamegraph.pl or speedscope). The profiled code
+  runs at full speed, so this is the mode to leave on in production.
+* ``cprofile``: deterministic cProfile of the whole turn, written as a
+  ``.prof`` file for ``pstats``/snakeviz. Much higher overhead.
+
+Profiles go to ``INTERVIEWBOT_PROFILE_DIR`` (default ``profiles/``) with a
+JSON sidecar holding the session ID and bot_state; only the newest
+``INTERVIEWBOT_PROFILE_KEEP`` profiles are kept.
+"""
+import cProfile
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+import instrumentation
+
+ENABLED = os.environ.get("INTERVIEWBOT_PROFILE", "").lower() in ("1", "true", "yes")
+MODE = os.environ.get("INTERVIEWBOT_PROFILE_MODE", "sample")
+SAMPLE_RATE = float(os.environ.get("INTERVIEWBOT_PROFILE_SAMPLE_RATE", "0.1"))
+THRESHOLD_MS = float(os.environ.get("INTERVIEWBOT_PROFILE_THRESHOLD_MS", "2000"))
+INTERVAL_MS = float(os.environ.get("INTERVIEWBOT_PROFILE_INTERVAL_MS", "10"))
+PROFILE_DIR = os.environ.get("INTERVIEWBOT_PROFILE_DIR", "profiles")
+MAX_PROFILES = int(os.environ.get("INTERVIEWBOT_PROFILE_KEEP", "50"))
+
+_local = threading.local()
+
+
+class _StackSampler:
+    """One daemon thread sampling the stacks of every thread inside a profiled turn."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._turns = {}
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id):
+        samples = Counter()
+        with self._lock:
+            self._turns[thread_id] = samples
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name="turn-profiler", daemon=True)
+                thread.start()
+                self._thread = thread
+            self._wake.set()
+        return samples
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._turns.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                thread_ids = list(self._turns)
+                if not thread_ids:
+                    self._wake.clear()
+            if not thread_ids:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            stacks = {tid: _collapse(frames[tid]) for tid in thread_ids if tid in frames}
+            del frames
+            with self._lock:
+                for thread_id, stack in stacks.items():
+                    if thread_id in self._turns:
+                        self._turns[thread_id][stack] += 1
+            time.sleep(INTERVAL_MS / 1000)
+
+
+def _collapse(frame):
+    """Render a frame chain as ``outer;...;inner`` for flame graphs."""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+_sampler = _StackSampler()
+
+
+def _rotate():
+    """Delete the oldest profiles so that at most ``MAX_PROFILES`` remain."""
+    try:
+        metas = sorted(
+            (entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+    except FileNotFoundError:
+        return
+    for entry in metas[:max(len(metas) - MAX_PROFILES, 0)]:
+        stem = entry.path[:-len(".json")]
+        for suffix in (".json", ".prof", ".folded"):
+            try:
+                os.remove(stem + suffix)
+            except FileNotFoundError:
+                pass
+
+
+def _write(name, elapsed, session_id, bot_state, final_state, profiler=None, samples=None):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    stem = os.path.join(PROFILE_DIR, f"{stamp}_{session_id or 'nosession'}_{name}")
+    if profiler is not None:
+        profiler.dump_stats(stem + ".prof")
+    else:
+        with open(stem + ".folded", "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+    meta = {
+        "name": name,
+        "session_id": session_id,
+        "bot_state": bot_state,
+        "final_bot_state": final_state,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "mode": "cprofile" if profiler is not None else "sample",
+        "interval_ms": INTERVAL_MS if profiler is None else None,
+        "pid": os.getpid(),
+        "created": datetime.now().isoformat(timespec="milliseconds"),
+    }
+    # The sidecar is written last; rotation keys off it
+    with open(stem + ".json", "w") as f:
+        json.dump(meta, f, indent=2)
+    _rotate()
+    instrumentation.incr("slow_turn_profiles", turn=name)
+
+
+@contextmanager
+def profile_turn(name, session_id="", bot_state="", get_final_state=None, force=False):
+    """Profile the enclosed turn and keep the profile if it was slow.
+
+    ``force`` (set from the ``?profile=1`` query parameter) profiles the turn
+    even when profiling is off process-wide and skips turn sampling.
+    """
+    if not (force or (ENABLED and random.random() < SAMPLE_RATE)) or getattr(_local, "active", False):
+        yield
+        return
+
+    thread_id = threading.get_ident()
+    profiler = None
+    enabled = False
+    start = time.perf_counter()
+    try:
+        _local.active = True
+        try:
+            if MODE == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+            else:
+                _sampler.start(thread_id)
+            enabled = True
+        except Exception:
+            # Profiling must never break a turn, e.g. when another profiler is already active
+            _sampler.stop(thread_id)
+            instrumentation.incr("profile_errors", turn=name)
+        yield
+    finally:
+        _local.active = False
+        if enabled:
+            _finish(name, start, thread_id, profiler, session_id, bot_state, get_final_state)
+
+
+def _finish(name, start, thread_id, profiler, session_id, bot_state, get_final_state):
+    if profiler is not None:
+        profiler.disable()
+        samples = None
+    else:
+        samples = _sampler.stop(thread_id)
+    elapsed = time.perf_counter() - start
+    if elapsed * 1000 >= THRESHOLD_MS and (profiler is not None or samples):
+        final_state = get_final_state() if get_final_state else bot_state
+        try:
+            _write(name, elapsed, session_id, bot_state, final_state, profiler, samples)
+        except OSError:
+            # Profiling must never break a turn
+            pass
@@ -0,0 +1,262 @@
+"""Hot-reloadable, versioned question bank.
+
+The built-in questions in ``interview_core`` are the base. JSON files in
+``INTERVIEWBOT_QUESTIONS_DIR`` (default ``questions``) replace the questions
+of the skills they name, or add new skills. Each file looks like this::
+
+    {"skill": "python", "questions": [
+        {"id": "python/decorators", "question": "...", "expected_keywords": ["..."]}
+    ]}
+
+Questions for ``"skill": "generic"`` replace the generic fallback questions.
+``id`` is optional and defaults to ``<skill>/<hash of the question text>``, so
+adding or removing a question never moves another question's id.
+
+A watcher thread polls the directory (``INTERVIEWBOT_QUESTIONS_POLL`` seconds,
+default 2). When a file changes it builds a new immutable ``BankSnapshot`` in
+the background: questions, id index and lemmatized keywords. It then swaps the
+snapshot in with a single reference assignment. Live turns only read the
+current reference, so a reload never blocks them. Sessions keep the snapshot
+they started with. A bank that fails validation is not swapped in, and the
+error is kept in ``last_error``.
+
+Usage:
+    python -m question_bank export questions/    # write the built-in bank as files
+    python -m question_bank check questions/     # validate a directory
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+import instrumentation
+
+QUESTIONS_DIR = os.environ.get("INTERVIEWBOT_QUESTIONS_DIR", "questions")
+POLL_SECONDS = float(os.environ.get("INTERVIEWBOT_QUESTIONS_POLL", "2"))
+GENERIC = "generic"
+
+
+class QuestionBankError(Exception):
+    """A question file is malformed; the previous bank stays in use."""
+
+
+class BankSnapshot:
+    """One immutable version of the question bank."""
+
+    __slots__ = ("version", "fingerprint", "technical", "generic", "by_id", "keywords", "sources", "loaded_at")
+
+    def __init__(self, version, technical, generic, keywords, sources):
+        self.version = version
+        self.technical = technical
+        self.generic = generic
+        self.by_id = {q["id"]: q for questions in list(technical.values()) + [generic] for q in questions}
+        self.keywords = keywords
+        self.sources = sources
+        self.loaded_at = time.time()
+        self.fingerprint = hashlib.sha256(
+            json.dumps([sorted((skill, list(qs)) for skill, qs in technical.items()), list(generic)], sort_keys=True).encode()
+        ).hexdigest()[:12]
+
+    def __repr__(self):
+        return f"<BankSnapshot v{self.version} {self.fingerprint} {len(self.by_id)} questions>"
+
+
+def question_id(skill, text):
+    """Default id of a question: stable for as long as its text is unchanged."""
+    return f"{skill}/{hashlib.sha256(text.encode('utf-8')).hexdigest()[:10]}"
+
+
+def _validate_question(question, path, position):
+    if not isinstance(question, dict):
+        raise QuestionBankError(f"{path}: question {position} is not an object")
+    text = question.get("question")
+    keywords = question.get("expected_keywords")
+    if not isinstance(text, str) or not text.strip():
+        raise QuestionBankError(f"{path}: question {position} has no question text")
+    if not isinstance(keywords, list) or not keywords or not all(isinstance(k, str) and k for k in keywords):
+        raise QuestionBankError(f"{path}: question {position} needs a non-empty list of expected_keywords")
+
+
+def read_question_files(directory):
+    """``{skill: [question, ...]}`` from every ``*.json`` file in ``directory``."""
+    by_skill = {}
+    sources = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json") or name.startswith("."):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            with open(path, encoding="utf-8") as f:
+                content = json.load(f)
+        except ValueError as e:
+            raise QuestionBankError(f"{path}: {e}")
+        if not isinstance(content, dict) or not isinstance(content.get("skill"), str) or not isinstance(content.get("questions"), list):
+            raise QuestionBankError(f'{path}: expected {{"skill": ..., "questions": [...]}}')
+        skill = content["skill"].strip().lower()
+        if skill in sources:
+            raise QuestionBankError(f"{path}: skill '{skill}' is also defined in {sources[skill]}")
+        for position, question in enumerate(content["questions"]):
+            _validate_question(question, path, position)
+        by_skill[skill] = content["questions"]
+        sources[skill] = name
+    return by_skill, sources
+
+
+def _freeze(skill, questions):
+    frozen = []
+    for question in questions:
+        frozen.append({
+            "id": question.get("id") or question_id(skill, question["question"]),
+            "skill": skill,
+            "question": question["question"],
+            "expected_keywords": list(question["expected_keywords"]),
+        })
+    return tuple(frozen)
+
+
+def build_snapshot(version, builtin_technical, builtin_generic, directory=None, preprocess=None):
+    """Merge the files in ``directory`` over the built-in bank; raises QuestionBankError."""
+    overrides, sources = ({}, {})
+    if directory and os.path.isdir(directory):
+        overrides, sources = read_question_files(directory)
+    technical = {skill: _freeze(skill, qs) for skill, qs in builtin_technical.items() if skill not in overrides}
+    generic = _freeze(GENERIC, overrides.get(GENERIC, builtin_generic))
+    for skill, questions in overrides.items():
+        if skill != GENERIC:
+            technical[skill] = _freeze(skill, questions)
+    seen = {}
+    for question in [q for qs in technical.values() for q in qs] + list(generic):
+        if question["id"] in seen:
+            raise QuestionBankError(f"duplicate question id '{question['id']}'")
+        seen[question["id"]] = question
+    keywords = {}
+    if preprocess is not None:
+        for question in seen.values():
+            for keyword in question["expected_keywords"]:
+                if keyword not in keywords:
+                    keywords[keyword] = preprocess(keyword)
+    return BankSnapshot(version, technical, generic, keywords, sources)
+
+
+class QuestionBank:
+    """Serves the current snapshot and reloads it when the directory changes."""
+
+    def __init__(self, directory, builtin_technical, builtin_generic, preprocess=None, poll_seconds=POLL_SECONDS):
+        self.directory = directory
+        self.poll_seconds = poll_seconds
+        self.last_error = None
+        self._builtin = (builtin_technical, builtin_generic)
+        self._preprocess = preprocess
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stamp = self._directory_stamp()
+        try:
+            self._current = self._build(1)
+        except QuestionBankError as e:
+            # Start on the built-in questions rather than not at all
+            self.last_error = str(e)
+            self._current = build_snapshot(1, builtin_technical, builtin_generic, None, preprocess)
+
+    def current(self):
+        """The snapshot new sessions should use (a plain reference read)."""
+        return self._current
+
+    def _build(self, version):
+        technical, generic = self._builtin
+        with instrumentation.timer("question_bank_build"):
+            return build_snapshot(version, technical, generic, self.directory, self._preprocess)
+
+    def _directory_stamp(self):
+        try:
+            entries = sorted(
+                (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                for entry in os.scandir(self.directory) if entry.name.endswith(".json")
+            )
+        except FileNotFoundError:
+            return None
+        return tuple(entries)
+
+    def reload(self, force=False):
+        """Rebuild if the directory changed; returns True when a new version was swapped in."""
+        with self._reload_lock:
+            stamp = self._directory_stamp()
+            if stamp == self._stamp and not force:
+                return False
+            self._stamp = stamp
+            try:
+                snapshot = self._build(self._current.version + 1)
+            except (QuestionBankError, OSError) as e:
+                self.last_error = str(e)
+                instrumentation.incr("question_bank_reloads", outcome="invalid")
+                return False
+            self.last_error = None
+            if snapshot.fingerprint == self._current.fingerprint:
+                instrumentation.incr("question_bank_reloads", outcome="unchanged")
+                return False
+            self._current = snapshot
+            instrumentation.incr("question_bank_reloads", outcome="swapped")
+            return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.reload()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+
+    def start(self):
+        """Start the background watcher (idempotent)."""
+        if self._thread is None and self.poll_seconds > 0:
+            self._thread = threading.Thread(target=self._watch, name="question-bank-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+def export_builtin(directory, builtin_technical, builtin_generic):
+    """Write the built-in bank as one file per skill, to start a questions directory."""
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for skill, questions in list(builtin_technical.items()) + [(GENERIC, builtin_generic)]:
+        path = os.path.join(directory, f"{skill}.json")
+        payload = {"skill": skill, "questions": [
+            {"id": q.get("id") or question_id(skill, q["question"]), "question": q["question"],
+             "expected_keywords": list(q["expected_keywords"])}
+            for q in questions
+        ]}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+            f.write("\n")
+        written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("directory", nargs="?", default=QUESTIONS_DIR)
+    args = parser.parse_args(argv)
+
+    from interview_core import GENERIC_QUESTIONS, TECHNICAL_QUESTIONS
+
+    if args.command == "export":
+        for path in export_builtin(args.directory, TECHNICAL_QUESTIONS, GENERIC_QUESTIONS):
+            print(f"Wrote {path}")
+        return 0
+    try:
+        snapshot = build_snapshot(1, TECHNICAL_QUESTIONS, GENERIC_QUESTIONS, args.directory)
+    except QuestionBankError as e:
+        print(f"Invalid: {e}")
+        return 1
+    print(f"OK: {len(snapshot.by_id)} questions, {len(snapshot.technical)} skills, fingerprint {snapshot.fingerprint}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""Gemini-generated questions for skills the question bank does not cover.
+
+Skills such as django, kubernetes or redis have no questions in the bank, so
+their interview slots go to generic questions. For those skills Gemini is
+asked for a few questions with expected keywords, at a difficulty derived
+from the candidate's evidence weight. Generation is speculative and never on
+the turn path:
+
+* prefetching starts as soon as the resume's skills are known and runs on a
+  small thread pool at ``llm_limiter.PRIORITY_PREFETCH``, behind live grading
+* generic slots in the interview are marked with the skill they could be
+  used for (``plan_slots``)
+* just before a slot is asked, ``fill_slot`` swaps in a generated question if
+  one is ready, and otherwise keeps the generic question
+
+Generated questions are cached by ``(skill, difficulty)`` in memory and in
+``generated_questions.json`` in ``INTERVIEWBOT_DATA_DIR``, so every session
+reuses them. Entries made with another prompt version are ignored. Set
+``INTERVIEWBOT_GENERATED_QUESTIONS=0`` to turn this off.
+
+Usage:
+    python -m question_generator list
+    python -m question_generator generate kubernetes redis --difficulty advanced
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+import interview_core
+import llm_limiter
+
+ENABLED = os.environ.get("INTERVIEWBOT_GENERATED_QUESTIONS", "1").lower() not in ("0", "false", "no")
+DATA_DIR = os.environ.get("INTERVIEWBOT_DATA_DIR", "data")
+WORKERS = int(os.environ.get("INTERVIEWBOT_GENERATION_WORKERS", "2"))
+# Skills to prefetch per resume, strongest evidence first
+PREFETCH_SKILLS = int(os.environ.get("INTERVIEWBOT_PREFETCH_SKILLS", "3"))
+QUESTIONS_PER_KEY = 3
+FAILURE_BACKOFF_SECONDS = 300
+
+DIFFICULTIES = ("foundational", "intermediate", "advanced")
+
+GENERATION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "questions": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "question": {"type": "STRING"},
+                    "expected_keywords": {"type": "ARRAY", "items": {"type": "STRING"}},
+                },
+                "required": ["question", "expected_keywords"],
+            },
+        },
+    },
+    "required": ["questions"],
+}
+
+
+def build_generation_prompt(skill, difficulty, count=QUESTIONS_PER_KEY):
+    return f"""
+    You are preparing a technical interview.
+    Skill: {skill}
+    Difficulty: {difficulty}
+    Number of questions: {count}
+    Write questions that test practical knowledge of this skill and can be answered in a few sentences in a chat.
+    For each question list 3-6 expected keywords or concepts a good answer mentions (short lowercase phrases).
+    Format as JSON with key "questions": a list of objects with keys "question" and "expected_keywords".
+    """
+
+
+# Cached questions made with another prompt or schema are not reused
+GENERATOR_VERSION = hashlib.sha256(json.dumps(
+    [build_generation_prompt("{skill}", "{difficulty}"), GENERATION_SCHEMA], sort_keys=True,
+).encode()).hexdigest()[:12]
+
+
+def difficulty_for(skill, profile=None):
+    """Question difficulty from the candidate's evidence weight for ``skill``."""
+    if profile is None or skill not in profile:
+        return "intermediate"
+    weight = profile.weight(skill)
+    if weight < 2:
+        return "foundational"
+    return "intermediate" if weight < 6 else "advanced"
+
+
+def generable(skill, bank):
+    """True for technical skills the bank has no questions for."""
+    if skill in bank.technical:
+        return False
+    categories = set(interview_core.SKILL_CATEGORIES.get(skill, ()))
+    return bool(categories) and categories != {"soft_skills"}
+
+
+def _valid_questions(result, skill, difficulty):
+    questions = []
+    seen = set()
+    for item in (result or {}).get("questions") or []:
+        if not isinstance(item, dict):
+            continue
+        text = str(item.get("question") or "").strip()
+        keywords = [str(k).strip().lower() for k in item.get("expected_keywords") or [] if str(k).strip()]
+        if not text or len(keywords) < 2 or text in seen:
+            continue
+        seen.add(text)
+        questions.append({
+            "id": f"generated/{skill}/{difficulty}/{hashlib.sha256(text.encode()).hexdigest()[:8]}",
+            "question": text,
+            "expected_keywords": keywords[:6],
+            "generated": True,
+        })
+    return questions[:QUESTIONS_PER_KEY]
+
+
+class GeneratedQuestionStore:
+    """``(skill, difficulty) -> [question, ...]``, shared by all sessions and kept on disk."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _ensure_loaded(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                content = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        for key, entry in content.get("entries", {}).items():
+            if entry.get("generator_version") == GENERATOR_VERSION:
+                self._entries[key] = entry
+
+    def get(self, skill, difficulty):
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(f"{skill}|{difficulty}")
+            return entry["questions"] if entry else None
+
+    def put(self, skill, difficulty, questions):
+        with self._lock:
+            self._ensure_loaded()
+            self._entries[f"{skill}|{difficulty}"] = {
+                "questions": questions, "generator_version": GENERATOR_VERSION, "created": time.time(),
+            }
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": self._entries}, f, indent=1)
+            os.replace(tmp_path, self.path)
+
+    def entries(self):
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._entries)
+
+
+class QuestionPrefetcher:
+    """Generates questions on background threads; at most one request per key at a time."""
+
+    def __init__(self, store, workers=WORKERS):
+        self.store = store
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="question-prefetch")
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._failed_at = {}
+
+    def prefetch(self, api_key, skill, difficulty):
+        """Start generating for a key unless it is cached, in flight or recently failed.
+
+        Returns the Future of the generation, or None when nothing was started.
+        """
+        if not api_key or self.store.get(skill, difficulty) is not None:
+            return None
+        key = (skill, difficulty)
+        with self._lock:
+            if key in self._in_flight:
+                return self._in_flight[key]
+            if time.monotonic() - self._failed_at.get(key, -FAILURE_BACKOFF_SECONDS) < FAILURE_BACKOFF_SECONDS:
+                return None
+            future = self._executor.submit(self._generate, api_key, skill, difficulty)
+            self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._finished(key))
+        return future
+
+    def _finished(self, key):
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def _generate(self, api_key, skill, difficulty):
+        contents = [{"role": "user", "parts": [{"text": build_generation_prompt(skill, difficulty)}]}]
+        try:
+            with instrumentation.timer("question_generation"):
+                result, _ = interview_core.generate_gemini_json(
+                    api_key, contents, GENERATION_SCHEMA, llm_limiter.PRIORITY_PREFETCH,
+                )
+            questions = _valid_questions(result, skill, difficulty)
+            if not questions:
+                raise ValueError("Gemini reply had no usable questions")
+        except Exception as e:
+            with self._lock:
+                self._failed_at[(skill, difficulty)] = time.monotonic()
+            instrumentation.incr("question_generation", outcome=type(e).__name__)
+            return None
+        self.store.put(skill, difficulty, questions)
+        instrumentation.incr("question_generation", outcome="ok")
+        return questions
+
+
+_prefetcher_lock = threading.Lock()
+_prefetcher = None
+
+
+def get_prefetcher():
+    """The process-wide prefetcher, shared by all sessions."""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = QuestionPrefetcher(GeneratedQuestionStore(os.path.join(DATA_DIR, "generated_questions.json")))
+        return _prefetcher
+
+
+def prefetch_for_profile(api_key, profile, bank, limit=PREFETCH_SKILLS):
+    """Start generating for the candidate's strongest skills the bank does not cover."""
+    if not ENABLED or not api_key:
+        return []
+    started = []
+    for skill in [s for s in profile.ranked_skills() if generable(s, bank)][:limit]:
+        difficulty = difficulty_for(skill, profile)
+        if get_prefetcher().prefetch(api_key, skill, difficulty) is not None:
+            started.append((skill, difficulty))
+    return started
+
+
+def plan_slots(questions, profile, bank, api_key=None):
+    """Mark generic questions with an uncovered skill they could be replaced by.
+
+    Returns a new list; the bank's question dicts are shared and never changed.
+    Prefetching starts for every planned slot.
+    """
+    if not ENABLED or profile is None:
+        return list(questions)
+    generic_ids = {q["id"] for q in bank.generic}
+    skills = [s for s in profile.ranked_skills() if generable(s, bank)]
+    planned = []
+    for question in questions:
+        if question.get("id") in generic_ids and skills:
+            skill = skills.pop(0)
+            difficulty = difficulty_for(skill, profile)
+            question = dict(question, generate_for=skill, generate_difficulty=difficulty)
+            get_prefetcher().prefetch(api_key, skill, difficulty)
+        planned.append(question)
+    return planned
+
+
+def fill_slot(questions, index):
+    """The question to ask at ``index``: a ready generated one, or the planned fallback.
+
+    Never waits for generation.
+    """
+    question = questions[index]
+    skill = question.get("generate_for")
+    if not skill:
+        return question
+    ready = get_prefetcher().store.get(skill, question["generate_difficulty"]) or []
+    asked = {q["question"] for q in questions}
+    unused = [q for q in ready if q["question"] not in asked]
+    if not unused:
+        instrumentation.incr("generated_question_slots", outcome="fallback")
+        return question
+    instrumentation.incr("generated_question_slots", outcome="generated")
+    return dict(random.choice(unused), skill=skill, difficulty=question["generate_difficulty"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Show cached generated questions")
+    generate_parser = commands.add_parser("generate", help="Generate and cache questions now")
+    generate_parser.add_argument("skills", nargs="+")
+    generate_parser.add_argument("--difficulty", choices=DIFFICULTIES, default="intermediate")
+    generate_parser.add_argument("--stub", action="store_true", help="Generate with the local Gemini stub")
+    args = parser.parse_args(argv)
+
+    prefetcher = get_prefetcher()
+    if args.command == "list":
+        for key, entry in sorted(prefetcher.store.entries().items()):
+            print(key)
+            for question in entry["questions"]:
+                print(f"  - {question['question']}  [{', '.join(question['expected_keywords'])}]")
+        return 0
+
+    if args.stub:
+        from benchmarks import gemini_stub
+
+        interview_core.GEMINI_URL = gemini_stub.server_url(gemini_stub.serve())
+        os.environ.setdefault("GEMINI_API_KEY", "stub-key")
+    api_key = interview_core.get_gemini_api_key()
+    if not api_key:
+        print("GEMINI_API_KEY is not set (use --stub to generate with the local stub)")
+        return 1
+    failed = 0
+    for skill in args.skills:
+        future = prefetcher.prefetch(api_key, skill.lower(), args.difficulty)
+        questions = future.result() if future else prefetcher.store.get(skill.lower(), args.difficulty)
+        if questions:
+            print(f"{skill}: {len(questions)} questions")
+        else:
+            print(f"{skill}: generation failed")
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""Re-grade stored interviews after the grading prompt or question bank changed.
+
+Usage:
+    python -m regrade                                # data/interviews.jsonl -> data/regrades.jsonl
+    python -m regrade --workers 8 --output /tmp/regrades.jsonl
+    python -m regrade --stub --latency 0.2           # against the local Gemini stub
+    python -m regrade --dry-run                      # only count what is out of date
+
+An answer is re-graded when its question's keywords differ from the current
+question bank (including ``INTERVIEWBOT_QUESTIONS_DIR``), when it was graded
+with another prompt version (``interview_core.PROMPT_VERSION``) or when it
+only got the NLP fallback grade. Answers whose question id is gone, or whose
+question text changed, are counted as retired and left alone: the candidate
+never saw the current question. Generated questions (``generated/`` ids) are
+not in the bank; their stored text and keywords are taken as current.
+Interviews are streamed from the store, at most ``--max-in-flight`` answers
+are queued for ``--workers`` threads, and calls go through the limiter at
+batch priority. The job runs in its own process, so it cannot queue behind
+the app's live traffic; instead it gets a small budget of its own,
+``--requests-per-minute`` (default ``INTERVIEWBOT_REGRADE_RPM`` or 10), on top
+of whatever the app is using on the same key.
+
+Every finished answer is appended to the output as soon as it is done, with
+the old and new grades side by side. The output is also the checkpoint: a
+re-run skips answers already re-graded for the same prompt version and
+keywords, so an interrupted job resumes where it stopped. Failed answers are
+recorded too and retried on the next run.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import interview_core
+import interview_store
+import llm_limiter
+from interview_core import PROMPT_VERSION, QUESTION_BANK, keywords_fingerprint
+
+FSYNC_EVERY = 50
+# The app shares the API key; keep re-grades well below its quota
+REQUESTS_PER_MINUTE = int(os.environ.get("INTERVIEWBOT_REGRADE_RPM", "10"))
+
+
+def stale_reasons(item):
+    """``(reasons, current_question)``; reasons is empty when the grade is current.
+
+    ``current_question`` is None when the question is no longer in the bank
+    or its text changed, so the stored answer was given to another question.
+    """
+    question_id = item.get("question_id") or ""
+    if question_id.startswith("generated/"):
+        current = {"id": question_id, "question": item["question"], "expected_keywords": item["expected_keywords"]}
+    else:
+        current = QUESTION_BANK.current().by_id.get(question_id)
+    if current is None or current["question"] != item["question"]:
+        return [], None
+    reasons = []
+    if keywords_fingerprint(current["expected_keywords"]) != item.get("keywords_fingerprint"):
+        reasons.append("keywords")
+    if item.get("grader") != "gemini":
+        reasons.append("fallback_grade")
+    elif item.get("prompt_version") != PROMPT_VERSION:
+        reasons.append("prompt_version")
+    return reasons, current
+
+
+def item_key(interview, item, position):
+    return f"{interview['interview_id']}/{item.get('question_id') or position}"
+
+
+def target_of(current):
+    """What a re-grade was made against; a checkpoint only counts for the same target."""
+    return f"{PROMPT_VERSION}:{keywords_fingerprint(current['expected_keywords'])}:{keywords_fingerprint([current['question']])}"
+
+
+def load_checkpoint(path):
+    """Keys already re-graded, mapped to the target they were graded against."""
+    done = {}
+    try:
+        f = open(path, encoding="utf-8")
+    except FileNotFoundError:
+        return done
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "ok":
+                done[record["key"]] = record["target"]
+    return done
+
+
+def regrade_item(api_key, key, interview, item, current, reasons, retries):
+    """Grade one stored answer again; always returns an output record."""
+    record = {
+        "key": key,
+        "interview_id": interview["interview_id"],
+        "question_id": item.get("question_id"),
+        "reasons": reasons,
+        "target": target_of(current),
+        "old": {
+            "score": item.get("score"),
+            "feedback": item.get("feedback"),
+            "missing_concepts": item.get("missing_concepts"),
+            "prompt_version": item.get("prompt_version"),
+            "keywords_fingerprint": item.get("keywords_fingerprint"),
+        },
+    }
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        try:
+            grade, outcome = interview_core.grade_answer_with_gemini(
+                api_key, current["question"], item["answer"], current["expected_keywords"], llm_limiter.PRIORITY_BATCH,
+            )
+        except Exception as e:
+            if attempt < retries:
+                time.sleep(2 ** attempt)
+                continue
+            record.update(status="failed", error=f"{type(e).__name__}: {e}", seconds=time.perf_counter() - start)
+            return record
+        new = dict(grade, prompt_version=PROMPT_VERSION, keywords_fingerprint=keywords_fingerprint(current["expected_keywords"]),
+                   parse_outcome=outcome)
+        old_score = item.get("score") or 0
+        record.update(status="ok", new=new, delta=grade["score"] - old_score, seconds=time.perf_counter() - start)
+        return record
+
+
+def run(input_path, output_path, workers=4, max_in_flight=None, retries=2, dry_run=False, limit=None, log=print):
+    """Re-grade every out-of-date answer in ``input_path``; returns counts by outcome."""
+    max_in_flight = max_in_flight or workers * 2
+    api_key = interview_core.get_gemini_api_key()
+    if not api_key and not dry_run:
+        raise SystemExit("GEMINI_API_KEY is not set (use --stub to grade against the local stub)")
+
+    done = load_checkpoint(output_path)
+    counts = {"current": 0, "retired": 0, "already_done": 0, "queued": 0, "ok": 0, "failed": 0}
+    deltas = []
+    started = time.perf_counter()
+
+    def items_to_grade():
+        for interview, item, position in _positioned_items(input_path):
+            reasons, current = stale_reasons(item)
+            if current is None:
+                counts["retired"] += 1
+                continue
+            if not reasons:
+                counts["current"] += 1
+                continue
+            key = item_key(interview, item, position)
+            if done.get(key) == target_of(current):
+                counts["already_done"] += 1
+                continue
+            if limit is not None and counts["queued"] >= limit:
+                return
+            counts["queued"] += 1
+            yield key, interview, item, current, reasons
+
+    if dry_run:
+        for _ in items_to_grade():
+            pass
+        return counts
+
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(workers, thread_name_prefix="regrade") as pool:
+        pending = set()
+        written = 0
+
+        def collect(futures):
+            nonlocal written
+            for future in futures:
+                record = future.result()
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                counts[record["status"]] += 1
+                if record["status"] == "ok":
+                    deltas.append(record["delta"])
+                written += 1
+                if written % FSYNC_EVERY == 0:
+                    os.fsync(out.fileno())
+                    elapsed = time.perf_counter() - started
+                    log(f"{written} re-graded ({counts['failed']} failed), {written / elapsed:.1f}/s")
+
+        try:
+            for key, interview, item, current, reasons in items_to_grade():
+                pending.add(pool.submit(regrade_item, api_key, key, interview, item, current, reasons, retries))
+                if len(pending) >= max_in_flight:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+            collect(pending)
+        except KeyboardInterrupt:
+            # Keep what finished; the rest is picked up by the next run
+            for future in pending:
+                future.cancel()
+            collect(f for f in pending if f.done() and not f.cancelled())
+            log("Interrupted; re-run the same command to resume")
+            raise
+        finally:
+            out.flush()
+            os.fsync(out.fileno())
+
+    if deltas:
+        counts["mean_delta"] = sum(deltas) / len(deltas)
+        counts["mean_abs_delta"] = sum(abs(d) for d in deltas) / len(deltas)
+    counts["seconds"] = time.perf_counter() - started
+    return counts
+
+
+def _positioned_items(input_path):
+    for interview in interview_store.iter_interviews(input_path):
+        for position, item in enumerate(interview.get("items", [])):
+            yield interview, item, position
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=interview_store.default_path(), help="Stored interviews (default: %(default)s)")
+    parser.add_argument("--output", default=os.path.join(interview_store.DATA_DIR, "regrades.jsonl"),
+                        help="Re-grades and checkpoint (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent Gemini calls")
+    parser.add_argument("--max-in-flight", type=int, help="Answers queued at once (default: 2 x workers)")
+    parser.add_argument("--retries", type=int, default=2, help="Retries per answer before it is recorded as failed")
+    parser.add_argument("--limit", type=int, help="Re-grade at most this many answers in this run")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what is out of date")
+    parser.add_argument("--requests-per-minute", type=float,
+                        help=f"Gemini calls per minute for this job (default: {REQUESTS_PER_MINUTE}; unlimited with --stub)")
+    parser.add_argument("--api-url", help="Gemini generateContent URL (default: GEMINI_API_URL or Google)")
+    parser.add_argument("--stub", action="store_true", help="Grade against the local Gemini stub")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub latency in seconds")
+    args = parser.parse_args(argv)
+
+    if args.stub:
+        from benchmarks import gemini_stub
+
+        stub = gemini_stub.serve(latency=args.latency)
+        interview_core.GEMINI_URL = gemini_stub.server_url(stub)
+        os.environ.setdefault("GEMINI_API_KEY", "stub-key")
+        os.environ.setdefault("GEMINI_RATE_LIMITS", gemini_stub.UNLIMITED)
+    if args.api_url:
+        interview_core.GEMINI_URL = args.api_url
+    requests_per_minute = args.requests_per_minute or (None if args.stub else REQUESTS_PER_MINUTE)
+    if requests_per_minute and not args.dry_run:
+        api_key = interview_core.get_gemini_api_key()
+        if api_key:
+            # Overrides GEMINI_RATE_LIMITS; a batch job waits for its turn rather than giving up
+            llm_limiter.configure(
+                api_key, requests_per_minute=requests_per_minute, burst=1, max_wait_seconds=24 * 3600,
+            )
+
+    print(f"Prompt version {PROMPT_VERSION}; reading {args.input}")
+    try:
+        counts = run(args.input, args.output, args.workers, args.max_in_flight, args.retries, args.dry_run, args.limit)
+    except KeyboardInterrupt:
+        return 130
+    print(json.dumps(counts, indent=2))
+    return 1 if counts.get("failed") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
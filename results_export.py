@@ -0,0 +1,265 @@
+"""Columnar (Parquet) export of completed interviews.
+
+Stored interviews (``interview_store``) are exported incrementally into two
+append-only Parquet datasets under ``INTERVIEWBOT_DATA_DIR/results``:
+
+``answers/``     one row per answered question: scores, missing concepts,
+                 grader, prompt version and timings
+``interviews/``  one row per interview: date, candidate skills, averages
+
+Each run converts only the interviews appended since the previous run (the
+byte offset into ``interviews.jsonl`` is kept in ``export_state.json``) and
+writes them as new part files named after the byte range they cover,
+``part-<start>-<end>.parquet``. Parts starting at or after the saved offset
+are left over from a run that crashed before saving it; they are removed
+and written again, so re-running after a crash never duplicates rows.
+``--compact`` merges the parts of a dataset into one file. ``cohort_analytics`` reads the datasets back.
+
+Usage:
+    python -m results_export
+    python -m results_export --batch-rows 500000 --compact
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+import interview_store
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+RESULTS_DIR = os.path.join(interview_store.DATA_DIR, "results")
+PASS_MARK = 60
+
+if PARQUET_AVAILABLE:
+    _dict_string = pa.dictionary(pa.int32(), pa.string())
+    ANSWER_SCHEMA = pa.schema([
+        ("interview_id", pa.string()),
+        ("completed_at", pa.timestamp("s")),
+        ("position", pa.int16()),
+        ("question_id", _dict_string),
+        ("skill", _dict_string),
+        ("difficulty", _dict_string),
+        ("score", pa.float32()),
+        ("passed", pa.bool_()),
+        ("missing_concepts", pa.list_(pa.string())),
+        ("missing_count", pa.int16()),
+        ("grader", _dict_string),
+        ("prompt_version", _dict_string),
+        ("reused", pa.bool_()),
+        ("answer_words", pa.int32()),
+        ("answer_seconds", pa.float32()),
+        ("grade_ms", pa.float32()),
+    ])
+    INTERVIEW_SCHEMA = pa.schema([
+        ("interview_id", pa.string()),
+        ("session_id", pa.string()),
+        ("interview_date", pa.string()),
+        ("completed_at", pa.timestamp("s")),
+        ("skills", pa.list_(pa.string())),
+        ("questions", pa.int16()),
+        ("avg_score", pa.float32()),
+    ])
+
+
+def question_skill(question_id):
+    """The bank section a question id belongs to ('python/3f2a9c01bd' -> 'python')."""
+    return question_id.split("/", 1)[0] if question_id else None
+
+
+def interview_rows(interview):
+    """``(answer_rows, interview_row)`` as plain column dicts for one stored interview."""
+    completed_at = int(interview.get("completed_at") or 0)
+    answers = []
+    for position, item in enumerate(interview.get("items", [])):
+        score = float(item.get("score") or 0)
+        missing = [str(concept) for concept in item.get("missing_concepts") or []]
+        answers.append({
+            "interview_id": interview["interview_id"],
+            "completed_at": completed_at,
+            "position": position,
+            "question_id": item.get("question_id"),
+            # Interviews stored before items carried their skill
+            "skill": item.get("skill") or question_skill(item.get("question_id")),
+            "difficulty": item.get("difficulty"),
+            "score": score,
+            "passed": score >= PASS_MARK,
+            "missing_concepts": missing,
+            "missing_count": len(missing),
+            "grader": item.get("grader"),
+            "prompt_version": item.get("prompt_version"),
+            "reused": item.get("duplicate_of") is not None,
+            "answer_words": len((item.get("answer") or "").split()),
+            "answer_seconds": item.get("answer_seconds"),
+            "grade_ms": item.get("grade_ms"),
+        })
+    skills = sorted({skill for skill_list in (interview.get("skills") or {}).values() for skill in skill_list})
+    row = {
+        "interview_id": interview["interview_id"],
+        "session_id": interview.get("session_id"),
+        "interview_date": interview.get("interview_date"),
+        "completed_at": completed_at,
+        "skills": skills,
+        "questions": len(answers),
+        "avg_score": sum(a["score"] for a in answers) / len(answers) if answers else None,
+    }
+    return answers, row
+
+
+_PART_RE = re.compile(r"part-(\d+)-(\d+)\.parquet$")
+
+
+def _part_name(start, end):
+    # Zero-padded so that name order is offset order
+    return f"part-{start:016d}-{end:016d}.parquet"
+
+
+def _part_range(name):
+    """``(start, end)`` byte range of a part file, or None for older timestamp-named parts."""
+    match = _PART_RE.match(name)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def _parts(directory):
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted(name for name in names if name.startswith("part-") and name.endswith(".parquet"))
+
+
+def _write_table(table, directory, name):
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, "." + name)
+    pq.write_table(table, tmp_path, compression="zstd")
+    # Readers only pick up complete files; a part from a crashed run is replaced whole
+    os.replace(tmp_path, os.path.join(directory, name))
+
+
+def _write_part(rows, schema, directory, start, end):
+    columns = {field.name: [row[field.name] for row in rows] for field in schema}
+    _write_table(pa.Table.from_pydict(columns, schema=schema), directory, _part_name(start, end))
+
+
+def _remove_unrecorded_parts(directory, offset):
+    """Delete parts of a run that crashed before saving its offset."""
+    for name in _parts(directory):
+        part_range = _part_range(name)
+        if part_range is not None and part_range[0] >= offset:
+            os.remove(os.path.join(directory, name))
+
+
+def _load_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"offset": 0, "interviews": 0}
+
+
+def _save_state(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def export(source=None, results_dir=RESULTS_DIR, batch_rows=200000):
+    """Export interviews appended to ``source`` since the last run; returns counts."""
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError("pyarrow is not installed. Please install it with: pip install pyarrow")
+    source = source or interview_store.default_path()
+    state_path = os.path.join(results_dir, "export_state.json")
+    os.makedirs(results_dir, exist_ok=True)
+    state = _load_state(state_path)
+    counts = {"interviews": 0, "answers": 0}
+    if not os.path.exists(source):
+        return counts
+    if os.path.getsize(source) < state["offset"]:
+        raise RuntimeError(f"{source} is shorter than the exported offset; was it rewritten?")
+
+    for dataset in ("answers", "interviews"):
+        _remove_unrecorded_parts(os.path.join(results_dir, dataset), state["offset"])
+    answers, interviews = [], []
+
+    def flush(offset):
+        if interviews:
+            _write_part(answers, ANSWER_SCHEMA, os.path.join(results_dir, "answers"), state["offset"], offset)
+            _write_part(interviews, INTERVIEW_SCHEMA, os.path.join(results_dir, "interviews"), state["offset"], offset)
+            counts["answers"] += len(answers)
+            counts["interviews"] += len(interviews)
+        state["offset"] = offset
+        state["interviews"] += len(interviews)
+        _save_state(state_path, state)
+        answers.clear()
+        interviews.clear()
+
+    with open(source, "rb") as f:
+        f.seek(state["offset"])
+        offset = state["offset"]
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Still being written; pick it up next time
+                break
+            offset += len(line)
+            try:
+                interview = json.loads(line)
+            except ValueError:
+                continue
+            answer_rows, interview_row = interview_rows(interview)
+            answers.extend(answer_rows)
+            interviews.append(interview_row)
+            if len(answers) >= batch_rows:
+                flush(offset)
+        flush(offset)
+    return counts
+
+
+def compact(directory):
+    """Merge the part files of one dataset into a single file."""
+    names = _parts(directory)
+    if len(names) < 2:
+        return len(names)
+    parts = [os.path.join(directory, name) for name in names]
+    # Parts written before a column was added get nulls for it
+    table = pa.concat_tables((pq.read_table(part) for part in parts), promote_options="default")
+    ranges = [r for r in map(_part_range, names) if r is not None]
+    name = _part_name(min((r[0] for r in ranges), default=0), max((r[1] for r in ranges), default=0))
+    merged = os.path.join(directory, name)
+    _write_table(table, directory, name)
+    for part in parts:
+        if part != merged:
+            os.remove(part)
+    return len(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=interview_store.default_path(), help="Stored interviews (default: %(default)s)")
+    parser.add_argument("--results-dir", default=RESULTS_DIR, help="Parquet datasets (default: %(default)s)")
+    parser.add_argument("--batch-rows", type=int, default=200000, help="Answer rows per part file")
+    parser.add_argument("--compact", action="store_true", help="Merge part files after exporting")
+    args = parser.parse_args(argv)
+    if not PARQUET_AVAILABLE:
+        print("pyarrow is not installed. Please install it with: pip install pyarrow")
+        return 1
+    start = time.perf_counter()
+    counts = export(args.source, args.results_dir, args.batch_rows)
+    print(f"Exported {counts['interviews']} interviews, {counts['answers']} answers in {time.perf_counter() - start:.2f}s")
+    if args.compact:
+        for dataset in ("answers", "interviews"):
+            directory = os.path.join(args.results_dir, dataset)
+            if os.path.isdir(directory):
+                print(f"Compacted {compact(directory)} parts of {dataset}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,500 @@
+"""Persistent inverted index from skills to candidates, as NumPy bitmaps.
+
+Every processed resume gets a dense candidate id. For each skill the index
+keeps a bitmap of the candidates that have it (``uint64`` words, bit ``i`` is
+candidate ``i``) and a posting list of ``(candidate id, evidence weight)``.
+Boolean queries are word-wise ``&``/``|``/``~`` over the bitmaps, so
+``python AND aws AND NOT java`` over two million candidates touches about
+100 KB per skill. Matches are ranked by the summed evidence weight
+(``SkillProfile.weight``) of the skills the query asks for.
+
+Candidates are keyed by the SHA-256 of their resume file, the same key as the
+text corpus, or of the UTF-8 text for resumes pasted into the chat. Re-inserting a key replaces the earlier entry.
+
+Storage, in ``INTERVIEWBOT_DATA_DIR`` (default ``data``):
+
+``skill_index.npz``    snapshot of the bitmaps, posting lists and keys
+``skill_index.jsonl``  inserts made since the snapshot, replayed on load
+
+A snapshot is written in the background every ``SNAPSHOT_EVERY`` inserts and
+by ``python -m skill_index snapshot``. The app only indexes resumes with
+``INTERVIEWBOT_SKILL_INDEX=1``; each entry also keeps a label: the uploaded
+file name, or the candidate's name for pasted resumes.
+
+Usage:
+    python -m skill_index query "python AND aws AND NOT java" --top 20
+    python -m skill_index load skills.jsonl        # output of text_corpus scan
+    python -m skill_index snapshot
+    python -m skill_index bench --synthetic 2000000
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+import numpy as np
+
+import instrumentation
+
+ENABLED = os.environ.get("INTERVIEWBOT_SKILL_INDEX", "").lower() in ("1", "true", "yes")
+DATA_DIR = os.environ.get("INTERVIEWBOT_DATA_DIR", "data")
+SNAPSHOT_EVERY = 10000
+
+_WORD = np.dtype("<u8")
+_TOKEN_RE = re.compile(r'\(|\)|"[^"]*"|[^\s()]+')
+
+
+class QueryError(ValueError):
+    """A skill query could not be parsed."""
+
+
+def parse_query(query, normalize=None):
+    """Parse ``query`` into nested tuples: ``("skill", s)``, ``("not", q)``, ``("and"|"or", [q, ...])``.
+
+    ``AND``/``OR``/``NOT`` are case-insensitive, adjacent terms are ANDed,
+    parentheses group and multi-word skills are quoted. ``normalize`` maps a
+    term to its canonical skill name.
+    """
+    tokens = _TOKEN_RE.findall(query)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def expression():
+        terms = [conjunction()]
+        while peek() is not None and peek().upper() == "OR":
+            take()
+            terms.append(conjunction())
+        return terms[0] if len(terms) == 1 else ("or", terms)
+
+    def conjunction():
+        terms = [factor()]
+        while peek() is not None and peek() != ")" and peek().upper() != "OR":
+            if peek().upper() == "AND":
+                take()
+            terms.append(factor())
+        return terms[0] if len(terms) == 1 else ("and", terms)
+
+    def factor():
+        token = peek()
+        if token is None:
+            raise QueryError("query ends where a skill was expected")
+        take()
+        if token.upper() == "NOT":
+            return ("not", factor())
+        if token == "(":
+            inner = expression()
+            if peek() != ")":
+                raise QueryError("missing ')'")
+            take()
+            return inner
+        if token == ")" or token.upper() in ("AND", "OR"):
+            raise QueryError(f"unexpected '{token}'")
+        skill = token.strip('"').strip().lower()
+        if not skill:
+            raise QueryError("empty skill name")
+        return ("skill", normalize(skill) if normalize else skill)
+
+    tree = expression()
+    if peek() is not None:
+        raise QueryError(f"unexpected '{peek()}'")
+    return tree
+
+
+def positive_skills(tree, negated=False):
+    """Skills the query asks for (not under a NOT); they decide the ranking."""
+    kind = tree[0]
+    if kind == "skill":
+        return [] if negated else [tree[1]]
+    if kind == "not":
+        return positive_skills(tree[1], not negated)
+    return [skill for term in tree[1] for skill in positive_skills(term, negated)]
+
+
+def bitmap_from_ids(ids, n_words):
+    mask = np.zeros(n_words * 64, dtype=bool)
+    mask[ids] = True
+    return np.packbits(mask, bitorder="little").view(_WORD)
+
+
+def bitmap_ids(bits, n):
+    """Candidate ids whose bit is set, ascending."""
+    return np.flatnonzero(np.unpackbits(bits.view(np.uint8), bitorder="little")[:n])
+
+
+def popcount(bits):
+    """Number of set bits in a bitmap."""
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(bits).sum())
+    # NumPy < 2.0
+    return int(np.unpackbits(bits.view(np.uint8)).sum(dtype=np.int64))
+
+
+class SkillIndex:
+    def __init__(self, directory=DATA_DIR, snapshot_every=SNAPSHOT_EVERY):
+        self.snapshot_path = os.path.join(directory, "skill_index.npz") if directory else None
+        self.log_path = os.path.join(directory, "skill_index.jsonl") if directory else None
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._loaded = False
+        self._keys = []
+        self._labels = []
+        self._ids = {}
+        self._capacity = 0
+        self._live = np.zeros(0, dtype=_WORD)
+        self._bits = {}
+        self._postings = {}
+        self._pending = {}
+        self._seq = 0
+        self._logged = 0
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._ids)
+
+    # Loading and persistence
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        snapshot_seq = 0
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            with instrumentation.timer("skill_index_load"), np.load(self.snapshot_path) as snapshot:
+                snapshot_seq = int(snapshot["seq"])
+                keys = json.loads(snapshot["keys"].tobytes())
+                labels = json.loads(snapshot["labels"].tobytes())
+                skills = json.loads(snapshot["skills"].tobytes())
+                self._install(keys, labels, snapshot["live"], {
+                    skill: (snapshot[f"bits/{skill}"], snapshot[f"ids/{skill}"], snapshot[f"weights/{skill}"]) for skill in skills
+                })
+        self._seq = snapshot_seq
+        if not self.log_path:
+            return
+        try:
+            f = open(self.log_path, encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash; everything before it is intact
+                    continue
+                if record["seq"] > snapshot_seq:
+                    self._insert(record["key"], record["weights"], record.get("label"))
+                    self._seq = record["seq"]
+                    self._logged += 1
+
+    def _install(self, keys, labels, live, postings):
+        """Replace the whole index with prebuilt arrays (snapshot load, bulk build)."""
+        self._keys = list(keys)
+        self._labels = list(labels)
+        n_words = max((len(keys) + 63) // 64, 1)
+        self._capacity = n_words
+        self._live = np.zeros(n_words, dtype=_WORD)
+        self._live[:len(live)] = live
+        self._ids = {self._keys[i]: int(i) for i in bitmap_ids(self._live, len(keys))}
+        self._bits, self._postings, self._pending = {}, {}, {}
+        for skill, (bits, ids, weights) in postings.items():
+            self._bits[skill] = np.zeros(n_words, dtype=_WORD)
+            self._bits[skill][:len(bits)] = bits
+            self._postings[skill] = (np.asarray(ids, dtype=np.int32), np.asarray(weights, dtype=np.float32))
+
+    def _grow(self, n):
+        needed = (n + 63) // 64
+        if needed <= self._capacity:
+            return
+        capacity = max(needed, self._capacity * 2, 16)
+        self._live = np.concatenate([self._live, np.zeros(capacity - self._capacity, dtype=_WORD)])
+        for skill, bits in self._bits.items():
+            self._bits[skill] = np.concatenate([bits, np.zeros(capacity - self._capacity, dtype=_WORD)])
+        self._capacity = capacity
+
+    def _insert(self, key, weights, label):
+        candidate = len(self._keys)
+        self._grow(candidate + 1)
+        previous = self._ids.get(key)
+        if previous is not None:
+            # Replaced: the old id stays in the bitmaps but is no longer live
+            self._live[previous >> 6] &= ~_WORD.type(1 << (previous & 63))
+        self._keys.append(key)
+        self._labels.append(label)
+        self._ids[key] = candidate
+        word, bit = candidate >> 6, _WORD.type(1 << (candidate & 63))
+        self._live[word] |= bit
+        for skill, weight in weights.items():
+            bits = self._bits.get(skill)
+            if bits is None:
+                bits = self._bits[skill] = np.zeros(self._capacity, dtype=_WORD)
+            bits[word] |= bit
+            self._pending.setdefault(skill, []).append((candidate, weight))
+        return candidate
+
+    def _posting(self, skill):
+        pending = self._pending.pop(skill, None)
+        ids, weights = self._postings.get(skill, (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)))
+        if pending:
+            ids = np.concatenate([ids, np.array([c for c, _ in pending], dtype=np.int32)])
+            weights = np.concatenate([weights, np.array([w for _, w in pending], dtype=np.float32)])
+            self._postings[skill] = (ids, weights)
+        return ids, weights
+
+    def _append(self, record):
+        if self.log_path is None:
+            return
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def add(self, key, weights, label=None):
+        """Index one candidate; ``weights`` is ``{skill: evidence weight}``. Returns the candidate id."""
+        with self._lock:
+            self._ensure_loaded()
+            self._seq += 1
+            candidate = self._insert(key, weights, label)
+            self._append({"seq": self._seq, "key": key, "label": label, "weights": weights})
+            self._logged += 1
+            due = self.snapshot_path and self._logged >= self.snapshot_every
+        if due and self._snapshot_lock.acquire(blocking=False):
+            threading.Thread(target=self._snapshot_in_background, name="skill-index-snapshot", daemon=True).start()
+        return candidate
+
+    def _snapshot_in_background(self):
+        try:
+            self._write_snapshot()
+        finally:
+            self._snapshot_lock.release()
+
+    def snapshot(self):
+        """Write the snapshot now and drop the log entries it covers."""
+        with self._snapshot_lock:
+            return self._write_snapshot()
+
+    def _write_snapshot(self):
+        # Copy under the lock (cheap), write outside it so inserts and queries carry on
+        with self._lock:
+            self._ensure_loaded()
+            n = len(self._keys)
+            n_words = max((n + 63) // 64, 1)
+            seq = self._seq
+            arrays = {
+                "seq": np.array(seq),
+                "keys": np.frombuffer(json.dumps(self._keys).encode(), dtype=np.uint8),
+                "labels": np.frombuffer(json.dumps(self._labels).encode(), dtype=np.uint8),
+                "skills": np.frombuffer(json.dumps(sorted(self._bits)).encode(), dtype=np.uint8),
+                "live": self._live[:n_words].copy(),
+            }
+            for skill in self._bits:
+                ids, weights = self._posting(skill)
+                arrays[f"bits/{skill}"] = self._bits[skill][:n_words].copy()
+                arrays[f"ids/{skill}"] = ids
+                arrays[f"weights/{skill}"] = weights
+        os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+        tmp_path = self.snapshot_path + ".tmp.npz"
+        with instrumentation.timer("skill_index_snapshot"):
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, self.snapshot_path)
+        with self._lock:
+            # Keep only the inserts made while the snapshot was being written
+            kept = []
+            if os.path.exists(self.log_path):
+                with open(self.log_path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            if json.loads(line)["seq"] > seq:
+                                kept.append(line)
+                        except ValueError:
+                            continue
+            with open(self.log_path + ".tmp", "w", encoding="utf-8") as f:
+                f.writelines(kept)
+            os.replace(self.log_path + ".tmp", self.log_path)
+            self._logged = len(kept)
+        return n
+
+    # Queries
+
+    def _evaluate(self, tree, n_words):
+        kind = tree[0]
+        if kind == "skill":
+            bits = self._bits.get(tree[1])
+            return bits[:n_words].copy() if bits is not None else np.zeros(n_words, dtype=_WORD)
+        if kind == "not":
+            return ~self._evaluate(tree[1], n_words) & self._live[:n_words]
+        terms = [self._evaluate(term, n_words) for term in tree[1]]
+        result = terms[0]
+        for term in terms[1:]:
+            if kind == "and":
+                result &= term
+            else:
+                result |= term
+        return result
+
+    def search(self, query, top=10, normalize=None):
+        """``(total, [(key, label, score), ...])`` for a boolean skill query, best evidence first."""
+        tree = parse_query(query, normalize) if isinstance(query, str) else query
+        with self._lock, instrumentation.timer("skill_index_search"):
+            self._ensure_loaded()
+            n = len(self._keys)
+            n_words = (n + 63) // 64
+            if n == 0:
+                return 0, []
+            matches = self._evaluate(tree, n_words) & self._live[:n_words]
+            total = popcount(matches)
+            if total == 0 or top <= 0:
+                return total, []
+            candidates = bitmap_ids(matches, n)
+            scores = np.zeros(n, dtype=np.float32)
+            for skill in set(positive_skills(tree)):
+                ids, weights = self._posting(skill)
+                # A candidate id appears at most once per skill, so plain fancy indexing is exact
+                scores[ids] += weights
+            candidate_scores = scores[candidates]
+            if len(candidates) > top:
+                best = np.argpartition(-candidate_scores, top - 1)[:top]
+            else:
+                best = np.arange(len(candidates))
+            best = best[np.lexsort((candidates[best], -candidate_scores[best]))]
+            return total, [(self._keys[candidates[i]], self._labels[candidates[i]], float(candidate_scores[i])) for i in best]
+
+    def skill_counts(self):
+        """``{skill: live candidates}``, most common first."""
+        with self._lock:
+            self._ensure_loaded()
+            n_words = (len(self._keys) + 63) // 64
+            counts = {skill: popcount(bits[:n_words] & self._live[:n_words]) for skill, bits in self._bits.items()}
+        return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+
+_index_lock = threading.Lock()
+_index = None
+
+
+def get_index():
+    """The process-wide index, shared by all sessions."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SkillIndex(DATA_DIR)
+        return _index
+
+
+def profile_weights(profile):
+    """``{skill: evidence weight}`` for a SkillProfile."""
+    current_year = time.localtime().tm_year
+    return {skill: round(profile.weight(skill, current_year), 3) for skill in profile.skills}
+
+
+def record_profile(key, profile, label=None):
+    """Index a processed resume; no-op when disabled or no skills were found."""
+    if not ENABLED or not len(profile):
+        return None
+    return get_index().add(key, profile_weights(profile), label)
+
+
+def synthetic_index(candidates, skills=60, skills_per_candidate=6, seed=0):
+    """In-memory index of generated candidates, for timing queries."""
+    rng = np.random.default_rng(seed)
+    names = ["python", "aws", "java"] + [f"skill{i}" for i in range(skills - 3)]
+    # Zipf-like popularity so some skills are common and most are rare
+    popularity = 1 / np.arange(1, skills + 1)
+    popularity /= popularity.sum()
+    owners = np.repeat(np.arange(candidates, dtype=np.int32), skills_per_candidate)
+    picked = rng.choice(skills, size=len(owners), p=popularity)
+    weights = rng.gamma(2.0, 1.5, len(owners)).astype(np.float32)
+    order = np.lexsort((owners, picked))
+    owners, picked, weights = owners[order], picked[order], weights[order]
+    bounds = np.searchsorted(picked, np.arange(skills + 1))
+    n_words = (candidates + 63) // 64
+    postings = {}
+    for i, name in enumerate(names):
+        ids = owners[bounds[i]:bounds[i + 1]]
+        # A skill picked twice for one candidate counts once
+        unique, first = np.unique(ids, return_index=True)
+        postings[name] = (bitmap_from_ids(unique, n_words), unique, weights[bounds[i]:bounds[i + 1]][first])
+    index = SkillIndex(None)
+    index._loaded = True
+    index._install([f"candidate-{i}" for i in range(candidates)], [None] * candidates,
+                   bitmap_from_ids(np.arange(candidates), n_words), postings)
+    return index
+
+
+def _normalizer():
+    from interview_core import SKILL_ALIAS_INDEX
+
+    return lambda skill: SKILL_ALIAS_INDEX.get(skill, skill)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    query_parser = commands.add_parser("query", help="Run a boolean skill query")
+    query_parser.add_argument("query")
+    query_parser.add_argument("--top", type=int, default=10)
+    load_parser = commands.add_parser("load", help="Index the JSON lines written by text_corpus scan")
+    load_parser.add_argument("path")
+    commands.add_parser("snapshot", help="Write the snapshot and truncate the log")
+    commands.add_parser("stats")
+    bench_parser = commands.add_parser("bench", help="Time queries over generated candidates")
+    bench_parser.add_argument("--synthetic", type=int, default=1000000, metavar="CANDIDATES")
+    bench_parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        start = time.perf_counter()
+        index = synthetic_index(args.synthetic)
+        print(f"Built {args.synthetic} candidates in {time.perf_counter() - start:.2f}s")
+        for query in ("python", "python AND aws AND NOT java", "(python OR java) AND skill7", "skill40 AND NOT skill41"):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                total, results = index.search(query, top=10)
+            elapsed = (time.perf_counter() - start) / args.repeat * 1000
+            print(f"{query!r}: {total} matches, top score {results[0][2] if results else 0:.2f}, {elapsed:.1f} ms")
+        return 0
+
+    index = SkillIndex(args.data_dir, snapshot_every=float("inf"))
+    if args.command == "query":
+        normalize = _normalizer()
+        start = time.perf_counter()
+        try:
+            total, results = index.search(args.query, args.top, normalize)
+        except QueryError as e:
+            print(f"Invalid query: {e}")
+            return 2
+        print(f"{total} candidates ({(time.perf_counter() - start) * 1000:.1f} ms incl. load)")
+        for key, label, score in results:
+            print(f"{score:8.2f}  {key}  {label or ''}")
+    elif args.command == "load":
+        added = 0
+        with open(args.path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("weights"):
+                    index.add(record["digest"], record["weights"], record.get("label"))
+                    added += 1
+        print(f"Indexed {added} candidates")
+        index.snapshot()
+    elif args.command == "snapshot":
+        print(f"Wrote {index.snapshot()} candidates to {index.snapshot_path}")
+    else:
+        print(f"{len(index)} candidates")
+        for skill, count in list(index.skill_counts().items())[:20]:
+            print(f"{count:10d}  {skill}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""Per-skill evidence collected while a resume is scanned.
+
+``SkillProfile`` replaces the deduplicated ``{category: [skills]}`` lists as
+the source of truth: every mention adds to a skill's count and remembers the
+first offset, the resume section and the most recent year seen near it, so
+question selection can rank skills by evidence without rescanning the text.
+``to_skills_dict()`` still produces the category lists the UI and reports use.
+"""
+import bisect
+import re
+from datetime import datetime
+
+SECTION_ALIASES = {
+    "summary": "summary",
+    "profile": "summary",
+    "about me": "summary",
+    "skills": "skills",
+    "technical skills": "skills",
+    "core skills": "skills",
+    "experience": "experience",
+    "work experience": "experience",
+    "professional experience": "experience",
+    "employment": "experience",
+    "employment history": "experience",
+    "projects": "projects",
+    "education": "education",
+    "certifications": "certifications",
+}
+
+# How much one mention counts for, by the section it appears in
+SECTION_WEIGHTS = {
+    "experience": 1.5,
+    "projects": 1.25,
+    "skills": 1.0,
+    "summary": 1.0,
+    "certifications": 1.0,
+    "education": 0.75,
+    None: 1.0,
+}
+
+_HEADING_RE = re.compile(
+    r"^[ \t]*(" + "|".join(sorted((re.escape(h) for h in SECTION_ALIASES), key=len, reverse=True)) + r")[ \t]*:?[ \t]*$",
+    re.MULTILINE,
+)
+_YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+
+
+class ResumeLayout:
+    """Section boundaries and year mentions of one (lower-cased) resume, found once."""
+
+    def __init__(self, text):
+        headings = [(m.start(), SECTION_ALIASES[m.group(1)]) for m in _HEADING_RE.finditer(text)]
+        self._heading_offsets = [offset for offset, _ in headings]
+        self._heading_names = [name for _, name in headings]
+        years = [(m.start(), int(m.group())) for m in _YEAR_RE.finditer(text)]
+        self._year_offsets = [offset for offset, _ in years]
+        self._years = [year for _, year in years]
+
+    def section_at(self, offset):
+        """Return ``(section_name, section_start)`` for a text offset."""
+        i = bisect.bisect_right(self._heading_offsets, offset) - 1
+        if i < 0:
+            return None, 0
+        return self._heading_names[i], self._heading_offsets[i]
+
+    def year_near(self, section_start, end):
+        """Latest year mentioned in the section before ``end`` (job headers precede bullets)."""
+        lo = bisect.bisect_left(self._year_offsets, section_start)
+        hi = bisect.bisect_left(self._year_offsets, end)
+        if lo >= hi:
+            return None
+        return max(self._years[lo:hi])
+
+
+class SkillEvidence:
+    __slots__ = ("skill", "categories", "count", "first_offset", "section", "last_year")
+
+    def __init__(self, skill, first_offset=None, section=None):
+        self.skill = skill
+        self.categories = set()
+        self.count = 0
+        self.first_offset = first_offset
+        self.section = section
+        self.last_year = None
+
+    def to_dict(self):
+        return {
+            "skill": self.skill,
+            "categories": sorted(self.categories),
+            "count": self.count,
+            "first_offset": self.first_offset,
+            "section": self.section,
+            "last_year": self.last_year,
+        }
+
+
+class SkillProfile:
+    def __init__(self):
+        self.skills = {}
+
+    def __len__(self):
+        return len(self.skills)
+
+    def __contains__(self, skill):
+        return skill in self.skills
+
+    def add(self, skill, categories, offset=None, section=None, year=None):
+        """Record one mention of ``skill``."""
+        evidence = self.skills.get(skill)
+        if evidence is None:
+            evidence = self.skills[skill] = SkillEvidence(skill, offset, section)
+        evidence.categories.update(categories)
+        evidence.count += 1
+        if year is not None and (evidence.last_year is None or year > evidence.last_year):
+            evidence.last_year = year
+        # Credit the skill to the strongest section it was seen in
+        if SECTION_WEIGHTS.get(section, 1.0) > SECTION_WEIGHTS.get(evidence.section, 1.0):
+            evidence.section = section
+
+    def merge(self, other):
+        """Fold another profile (e.g. skills typed in chat) into this one."""
+        for skill, theirs in other.skills.items():
+            mine = self.skills.get(skill)
+            if mine is None:
+                mine = self.skills[skill] = SkillEvidence(skill, theirs.first_offset, theirs.section)
+            elif SECTION_WEIGHTS.get(theirs.section, 1.0) > SECTION_WEIGHTS.get(mine.section, 1.0):
+                mine.section = theirs.section
+            mine.categories |= theirs.categories
+            mine.count += theirs.count
+            if theirs.last_year is not None and (mine.last_year is None or theirs.last_year > mine.last_year):
+                mine.last_year = theirs.last_year
+        return self
+
+    def weight(self, skill, current_year=None):
+        evidence = self.skills[skill]
+        weight = evidence.count * SECTION_WEIGHTS.get(evidence.section, 1.0)
+        if evidence.last_year is not None:
+            age = (current_year or datetime.now().year) - evidence.last_year
+            # Up to +50% for skills used in the last few years, fading out over a decade
+            weight *= 1 + 0.5 * max(0.0, 1 - max(age, 0) / 10)
+        return weight
+
+    def ranked_skills(self):
+        """Skills ordered by evidence weight, earliest mention first on ties."""
+        current_year = datetime.now().year
+        weights = {skill: self.weight(skill, current_year) for skill in self.skills}
+        return sorted(
+            self.skills,
+            key=lambda skill: (-weights[skill], self.skills[skill].first_offset if self.skills[skill].first_offset is not None else float("inf")),
+        )
+
+    def to_skills_dict(self):
+        """``{category: [skills]}`` with the skills of each category in rank order."""
+        skills = {}
+        for skill in self.ranked_skills():
+            for category in sorted(self.skills[skill].categories):
+                skills.setdefault(category, []).append(skill)
+        return skills
+
+    @classmethod
+    def from_skills_dict(cls, skills):
+        """Profile with one mention per listed skill, for skills entered by hand."""
+        profile = cls()
+        for category, skill_list in skills.items():
+            for skill in skill_list:
+                evidence = profile.skills.get(skill)
+                if evidence is None:
+                    profile.add(skill, {category})
+                else:
+                    evidence.categories.add(category)
+        return profile
+
+    def to_dict(self):
+        return {skill: evidence.to_dict() for skill, evidence in self.skills.items()}
@@ -5,6 +5,9 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from io import BytesIO
 import streamlit as st
 
+import instrumentation
+
+@instrumentation.timed("generate_interview_results_pdf")
 def generate_interview_results_pdf(interview_data):
     """Generate a PDF with interview results using ReportLab (no external dependencies)."""
     try:
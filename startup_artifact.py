@@ -0,0 +1,134 @@
+"""Precompiled startup tables: skill matcher, alias index, question keywords, stopwords.
+
+Building these at import means NLTK corpus loads, lemmatizing every question
+keyword and sorting the skill aliases on every cold start. ``python -m
+startup_artifact`` does that once (e.g. in the image build) and writes a
+single versioned file which the app reads at startup.
+
+File layout::
+
+    magic (8 bytes) | format version (u32) | payload length (u64) | sha256 of payload (32 bytes) | payload
+
+The payload is UTF-8 JSON of ``{"fingerprint": ..., "tables": {...}}``; sets
+are stored as sorted lists. It is plain data, so a tampered file can at worst
+hold wrong tables, never run code. The fingerprint hashes the taxonomy and question bank the tables were built from,
+so an artifact from an older build is ignored rather than served stale.
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import struct
+import sys
+import time
+
+MAGIC = b"IVBTABLE"
+FORMAT_VERSION = 2
+_HEADER = struct.Struct("<8sIQ32s")
+
+DEFAULT_PATH = os.environ.get(
+    "INTERVIEWBOT_STARTUP_ARTIFACT",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_tables.bin"),
+)
+
+
+class ArtifactError(Exception):
+    """The artifact is missing, corrupt, from another format version or stale."""
+
+
+def fingerprint(*sources):
+    """Stable hash of the (JSON-like) inputs the tables are built from."""
+    digest = hashlib.sha256(repr(FORMAT_VERSION).encode())
+    for source in sources:
+        digest.update(pickle.dumps(_canonical(source), protocol=4))
+    return digest.hexdigest()
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _canonical(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_canonical(v) for v in value))
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"{type(value).__name__} cannot be stored in the artifact")
+
+
+def write(path, tables, source_fingerprint):
+    """Write ``tables`` atomically to ``path``."""
+    payload = json.dumps(
+        {"fingerprint": source_fingerprint, "tables": tables}, default=_json_default, separators=(",", ":"),
+    ).encode("utf-8")
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(payload), hashlib.sha256(payload).digest())
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return len(header) + len(payload)
+
+
+def read(path, expected_fingerprint=None):
+    """Read the artifact, verify it and return its tables. Raises ArtifactError."""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError as e:
+        raise ArtifactError(f"cannot open {path}: {e}")
+    if len(raw) < _HEADER.size:
+        raise ArtifactError(f"{path} is truncated")
+    magic, version, length, checksum = _HEADER.unpack_from(raw)
+    if magic != MAGIC:
+        raise ArtifactError(f"{path} is not a startup artifact")
+    if version != FORMAT_VERSION:
+        raise ArtifactError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+    if len(raw) != _HEADER.size + length:
+        raise ArtifactError(f"{path} is truncated")
+    payload = raw[_HEADER.size:]
+    if hashlib.sha256(payload).digest() != checksum:
+        raise ArtifactError(f"{path} failed its checksum")
+    try:
+        content = json.loads(payload)
+    except ValueError as e:
+        raise ArtifactError(f"{path} could not be decoded: {e}")
+    if not isinstance(content, dict) or not isinstance(content.get("tables"), dict):
+        raise ArtifactError(f"{path} could not be decoded: no tables")
+    if expected_fingerprint is not None and content.get("fingerprint") != expected_fingerprint:
+        raise ArtifactError(f"{path} was built from a different taxonomy or question bank")
+    return content["tables"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the precompiled startup tables.")
+    parser.add_argument("--output", default=DEFAULT_PATH, help="Artifact path (default: %(default)s)")
+    parser.add_argument("--check", action="store_true", help="Only verify an existing artifact is current")
+    args = parser.parse_args(argv)
+
+    import interview_core
+
+    if args.check:
+        try:
+            read(args.output, interview_core.startup_fingerprint())
+        except ArtifactError as e:
+            print(f"Artifact not usable: {e}")
+            return 1
+        print(f"{args.output} is current")
+        return 0
+
+    start = time.perf_counter()
+    tables = interview_core.build_startup_tables()
+    size = write(args.output, tables, interview_core.startup_fingerprint())
+    print(f"Wrote {args.output} ({size} bytes, {len(tables['question_keywords'])} keywords, "
+          f"NLP {'on' if interview_core.NLP_ENABLED else 'off'}) in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+from unittest import mock
+
+import pytest
+
+import interview_core
+from benchmarks import gemini_stub
+
+QUESTION = "What does a Python decorator do?"
+ANSWER = "It wraps a function to add behaviour."
+KEYWORDS = ["wrap", "function"]
+GOOD = '{"score": 80, "feedback": "Clear.", "missing_concepts": []}'
+
+
+@pytest.fixture(autouse=True)
+def one_reask(monkeypatch):
+    monkeypatch.setattr(interview_core, "MAX_REASKS", 1)
+
+
+def grade(replies, **kwargs):
+    with gemini_stub.installed(replies=replies):
+        return interview_core.grade_answer_with_gemini("stub-key", QUESTION, ANSWER, KEYWORDS, **kwargs)
+
+
+def test_direct():
+    assert grade([GOOD]) == ({"score": 80, "feedback": "Clear.", "missing_concepts": []}, "direct")
+
+
+def test_fenced_reply_is_direct():
+    assert grade([f"Sure!\n```json\n{GOOD}\n```"])[1] == "direct"
+
+
+def test_reask_after_malformed_reply():
+    requests = []
+    post = gemini_stub.make_post(replies=["I'd give it 80/100.", GOOD])
+
+    def recording_post(url, headers=None, json=None, **kwargs):
+        requests.append(json)
+        return post(url, headers, json, **kwargs)
+
+    with gemini_stub.installed(), mock.patch.object(interview_core.requests, "post", recording_post):
+        result, outcome = interview_core.grade_answer_with_gemini("stub-key", QUESTION, ANSWER, KEYWORDS)
+    assert (result["score"], outcome) == (80, "reask")
+    # The second request shows the model its own reply and asks it to fix it
+    contents = requests[1]["contents"]
+    assert [turn["role"] for turn in contents] == ["user", "model", "user"]
+    assert contents[1]["parts"][0]["text"] == "I'd give it 80/100."
+    assert contents[2]["parts"][0]["text"] == interview_core.REASK_PROMPT
+
+
+def test_salvaged_from_truncated_replies():
+    truncated = '{"score": 65, "feedback": "Mentions wrapping but'
+    result, outcome = grade([truncated, truncated])
+    assert outcome == "salvaged"
+    assert result["score"] == 65
+    assert result["feedback"] == "Mentions wrapping but"
+
+
+def test_failed_without_a_score():
+    with pytest.raises(ValueError):
+        grade(["no json at all", '{"feedback": "cut'])
+
+
+@pytest.mark.parametrize("score, expected", [("250", 100), ("-5", 0), ('"high"', 50)])
+def test_scores_are_clamped(score, expected):
+    result, _ = grade([f'{{"score": {score}, "feedback": "x", "missing_concepts": "one"}}'])
+    assert result["score"] == expected
+    assert result["missing_concepts"] == ["one"]
+
+
+def test_streamed_non_ascii_feedback(monkeypatch):
+    reply = '{"score": 90, "feedback": "Très bien — café ☕", "missing_concepts": []}'
+    server = gemini_stub.server_url(gemini_stub.serve(replies=[reply]))
+    monkeypatch.setattr(interview_core, "GEMINI_URL", server)
+    monkeypatch.setenv("GEMINI_RATE_LIMITS", gemini_stub.UNLIMITED)
+    partials = []
+    result, outcome = interview_core.grade_answer_with_gemini(
+        "stub-http-key", QUESTION, ANSWER, KEYWORDS, on_partial=lambda parser: partials.append(parser.partial("feedback")),
+    )
+    assert (result["feedback"], outcome) == ("Très bien — café ☕", "direct")
+    assert all(p is None or "Très bien — café ☕".startswith(p) for p in partials)
@@ -0,0 +1,87 @@
+import pytest
+
+from llm_json import StreamingJSONParser, extract_json_object, partial_number_field, partial_string_field
+
+GRADE = '{"score": 72, "feedback": "Mentions \\"yield\\" and {braces}", "missing_concepts": ["send()"]}'
+
+
+def feed_in_chunks(text, size):
+    parser = StreamingJSONParser()
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+    return parser
+
+
+@pytest.mark.parametrize("text", [
+    GRADE,
+    f"```json\n{GRADE}\n```",
+    f"Here is the grade:\n{GRADE}\nLet me know if you need more.",
+])
+def test_extract_json_object_around_prose_and_fences(text):
+    assert extract_json_object(text)["score"] == 72
+
+
+@pytest.mark.parametrize("text", ["", "no json here", "[1, 2, 3]", '{"score": 72, "feedback": "cut of', "{{{"])
+def test_extract_json_object_malformed_or_truncated(text):
+    assert extract_json_object(text) is None
+
+
+def test_extract_json_object_skips_broken_candidates():
+    assert extract_json_object('{"a": } then {"b": 1}') == {"b": 1}
+
+
+def test_extract_json_object_nested():
+    text = 'x {"outer": {"inner": [1, {"deep": "}"}]}, "n": 2} y'
+    assert extract_json_object(text) == {"outer": {"inner": [1, {"deep": "}"}]}, "n": 2}
+
+
+def test_partial_string_field_truncated_mid_escape():
+    assert partial_string_field('{"feedback": "Good use of \\"gen', "feedback") == 'Good use of "gen'
+    assert partial_string_field('{"feedback": "caf\\u00', "feedback") == "caf"
+    assert partial_string_field('{"feedback": "ends with \\', "feedback") == "ends with "
+
+
+def test_partial_string_field_missing():
+    assert partial_string_field('{"score": 5', "feedback") is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"score": 85, "feed', 85),
+    ('{"score": 72.5}', 72.5),
+    ('{"score": -3\n', -3),
+    ('{"score": 8', None),  # may still be 80 or 85
+    ('{"feedback": "x"}', None),
+])
+def test_partial_number_field(text, expected):
+    assert partial_number_field(text, "score") == expected
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, len(GRADE)])
+def test_streaming_parser_any_chunking(size):
+    parser = feed_in_chunks(f"prefix {GRADE} suffix", size)
+    assert parser.result == extract_json_object(GRADE)
+
+
+def test_streaming_parser_nested_object():
+    parser = feed_in_chunks('{"a": {"b": {"c": "}}"}}, "d": [{}]}', 2)
+    assert parser.result == {"a": {"b": {"c": "}}"}}, "d": [{}]}
+
+
+def test_streaming_parser_truncated():
+    parser = feed_in_chunks(GRADE[:GRADE.index("eld")], 5)
+    assert parser.result is None
+    assert parser.partial("feedback") == 'Mentions "yi'
+
+
+def test_streaming_parser_skips_malformed_object():
+    parser = StreamingJSONParser()
+    assert parser.feed("{not json} ") is None
+    assert parser.feed('{"score": 1}') == {"score": 1}
+
+
+def test_streaming_parser_keeps_text_after_result():
+    parser = StreamingJSONParser()
+    parser.feed('{"score": 1}')
+    parser.feed(" trailing")
+    assert parser.text.endswith(" trailing")
+    assert parser.partial("score") is None
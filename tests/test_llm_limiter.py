@@ -0,0 +1,175 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import llm_limiter
+from llm_limiter import PRIORITY_BATCH, PRIORITY_LIVE, PRIORITY_PREFETCH, GeminiLimiter, RateLimitTimeout, TokenBucket
+
+
+def make_limiter(**limits):
+    return GeminiLimiter("test", dict(llm_limiter.DEFAULT_LIMITS, **limits))
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate_per_second=2.0, capacity=2)
+    now = bucket.updated
+    assert bucket.wait_time(now) == 0
+    bucket.take()
+    bucket.take()
+    assert bucket.wait_time(now) == pytest.approx(0.5)
+    assert bucket.wait_time(now + 0.5) == 0
+    # Never more than the burst capacity
+    assert bucket.wait_time(now + 60) == 0 and bucket.tokens == 2
+
+
+def test_token_bucket_pause():
+    bucket = TokenBucket(rate_per_second=1.0, capacity=5)
+    now = bucket.updated
+    bucket.pause(3.0, now)
+    assert bucket.wait_time(now) == pytest.approx(4.0)
+    assert bucket.wait_time(now + 4.0) == 0
+
+
+def test_live_calls_go_before_queued_batch_calls():
+    limiter = make_limiter(max_concurrency=1, requests_per_minute=10 ** 6, burst=10 ** 6)
+    order = []
+
+    def call(name, priority):
+        with limiter.slot(priority):
+            order.append(name)
+
+    with limiter.slot(PRIORITY_LIVE):
+        threads = []
+        for name, priority in [("batch", PRIORITY_BATCH), ("prefetch", PRIORITY_PREFETCH), ("live", PRIORITY_LIVE)]:
+            thread = threading.Thread(target=call, args=(name, priority))
+            thread.start()
+            threads.append(thread)
+            wait_until(lambda n=len(threads): len(limiter._queue) == n)
+    for thread in threads:
+        thread.join(2)
+    assert order == ["live", "prefetch", "batch"]
+
+
+def test_equal_priority_is_first_come_first_served():
+    limiter = make_limiter(max_concurrency=1, requests_per_minute=10 ** 6, burst=10 ** 6)
+    order = []
+
+    def call(name):
+        with limiter.slot(PRIORITY_BATCH):
+            order.append(name)
+
+    with limiter.slot(PRIORITY_BATCH):
+        threads = []
+        for name in "abc":
+            thread = threading.Thread(target=call, args=(name,))
+            thread.start()
+            threads.append(thread)
+            wait_until(lambda n=len(threads): len(limiter._queue) == n)
+    for thread in threads:
+        thread.join(2)
+    assert order == ["a", "b", "c"]
+
+
+def test_timeout_when_no_slot_frees_up():
+    limiter = make_limiter(max_concurrency=1)
+    with limiter.slot():
+        start = time.monotonic()
+        with pytest.raises(RateLimitTimeout):
+            with limiter.slot(max_wait=0.05):
+                pass
+        assert time.monotonic() - start < 1
+    assert limiter.stats()["timeouts"] == 1
+    # The timed-out ticket left the queue, so the next call goes straight through
+    assert limiter._queue == []
+    with limiter.slot(max_wait=0.05):
+        pass
+
+
+def test_timeout_while_rate_limited():
+    limiter = make_limiter(requests_per_minute=60, burst=1)
+    with limiter.slot():
+        pass
+    with pytest.raises(RateLimitTimeout):
+        with limiter.slot(max_wait=0.05):
+            pass
+
+
+def test_concurrency_is_capped():
+    limiter = make_limiter(max_concurrency=2, requests_per_minute=10 ** 6, burst=10 ** 6)
+    peak = []
+    lock = threading.Lock()
+    active = [0]
+
+    def call():
+        with limiter.slot():
+            with lock:
+                active[0] += 1
+                peak.append(active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert max(peak) == 2
+    assert limiter.stats()["acquired"] == 8
+
+
+def test_throttled_pauses_for_retry_after():
+    limiter = make_limiter(requests_per_minute=6000, burst=10)
+    limiter.throttled(0.2)
+    start = time.monotonic()
+    with limiter.slot():
+        pass
+    assert time.monotonic() - start >= 0.19
+    assert limiter.stats()["throttled"] == 1
+
+
+def test_throttled_without_retry_after_waits_one_token():
+    limiter = make_limiter(requests_per_minute=600, burst=10)
+    limiter.throttled()
+    assert limiter.bucket.wait_time(time.monotonic()) == pytest.approx(0.2, abs=0.02)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("120", 120.0),
+    ("1.5", 1.5),
+    ("-3", 0.0),
+    ("Wed, 21 Oct 2015 07:28:30 GMT", 30.0),
+    ("Wed, 21 Oct 2015 07:27:00 GMT", 0.0),
+    ("nan", None),
+    ("soon", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_retry_after(value, expected):
+    now = datetime(2015, 10, 21, 7, 28, 0, tzinfo=timezone.utc)
+    assert llm_limiter.parse_retry_after(value, now) == expected
+
+
+def test_limits_from_environment(monkeypatch):
+    monkeypatch.setenv("GEMINI_RATE_LIMITS", '{"default": {"burst": 3}, "abc": {"max_concurrency": 1}}')
+    assert llm_limiter.load_limits("abc") == dict(llm_limiter.DEFAULT_LIMITS, burst=3, max_concurrency=1)
+    assert llm_limiter.load_limits("other")["max_concurrency"] == llm_limiter.DEFAULT_LIMITS["max_concurrency"]
+    monkeypatch.setenv("GEMINI_RATE_LIMITS", "not json")
+    assert llm_limiter.load_limits("abc") == llm_limiter.DEFAULT_LIMITS
+
+
+def test_configure_replaces_the_key_limiter():
+    before = llm_limiter.get_limiter("configure-test-key")
+    after = llm_limiter.configure("configure-test-key", requests_per_minute=10, burst=1)
+    assert after is not before
+    assert llm_limiter.get_limiter("configure-test-key") is after
+    assert after.limits["requests_per_minute"] == 10
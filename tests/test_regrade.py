@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+import interview_store
+import regrade
+from benchmarks import gemini_stub
+
+
+def quiet(*args):
+    pass
+
+
+def question(i):
+    return {"id": f"generated/python/{i}", "skill": "python", "question": f"Question {i}?",
+            "expected_keywords": ["wrap", f"term{i}"]}
+
+
+@pytest.fixture
+def stored(tmp_path, monkeypatch):
+    """Six stored answers to generated questions, graded with an older prompt."""
+    path = tmp_path / "interviews.jsonl"
+    questions = [question(i) for i in range(6)]
+    evaluations = {q["question"]: {"answer": f"I would wrap it with term{i}.", "evaluation": {"score": 10}}
+                   for i, q in enumerate(questions)}
+    with open(path, "w", encoding="utf-8") as f:
+        for start in (0, 3):
+            record = interview_store.interview_record("s", "Ada", "2026-01-01", ["python"], questions[start:start + 3], evaluations)
+            f.write(json.dumps(record) + "\n")
+    monkeypatch.setattr(regrade, "PROMPT_VERSION", "next-prompt")
+    monkeypatch.setattr(regrade.interview_core, "MAX_REASKS", 0)
+    return str(path)
+
+
+def run(stored, output, **kwargs):
+    with gemini_stub.installed(replies=kwargs.pop("replies", None)):
+        return regrade.run(stored, output, workers=1, retries=0, log=quiet, **kwargs)
+
+
+def records(output):
+    with open(output, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_resume_skips_finished_answers(stored, tmp_path):
+    output = str(tmp_path / "regrades.jsonl")
+    first = run(stored, output, limit=2)
+    assert (first["queued"], first["ok"]) == (2, 2)
+    second = run(stored, output)
+    assert (second["already_done"], second["queued"], second["ok"]) == (2, 4, 4)
+    assert run(stored, output)["already_done"] == 6
+    graded = records(output)
+    assert len({r["key"] for r in graded}) == 6
+    assert all(r["new"]["score"] == 100 and r["old"]["score"] == 10 for r in graded)
+
+
+def test_failed_answers_are_retried(stored, tmp_path):
+    output = str(tmp_path / "regrades.jsonl")
+    first = run(stored, output, replies=["no json at all"])
+    assert (first["ok"], first["failed"]) == (5, 1)
+    second = run(stored, output)
+    assert (second["already_done"], second["ok"], second["failed"]) == (5, 1, 0)
+
+
+def test_new_prompt_version_grades_again(stored, tmp_path, monkeypatch):
+    output = str(tmp_path / "regrades.jsonl")
+    run(stored, output)
+    monkeypatch.setattr(regrade, "PROMPT_VERSION", "newer-prompt")
+    counts = run(stored, output)
+    assert (counts["already_done"], counts["ok"]) == (0, 6)
+
+
+def test_torn_checkpoint_line_is_ignored(stored, tmp_path):
+    output = str(tmp_path / "regrades.jsonl")
+    run(stored, output, limit=3)
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"key": "torn", "status": "o')
+    counts = run(stored, output)
+    assert (counts["already_done"], counts["ok"]) == (3, 3)
+
+
+def test_current_answers_are_not_queued(stored, tmp_path, monkeypatch):
+    monkeypatch.setattr(regrade, "PROMPT_VERSION", regrade.interview_core.PROMPT_VERSION)
+    counts = regrade.run(stored, str(tmp_path / "regrades.jsonl"), dry_run=True, log=quiet)
+    assert (counts["current"], counts["queued"]) == (6, 0)
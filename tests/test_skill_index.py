@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from skill_index import QueryError, SkillIndex, parse_query, popcount, positive_skills
+
+
+def skill(name):
+    return ("skill", name)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("python", skill("python")),
+    ("Python AND aws", ("and", [skill("python"), skill("aws")])),
+    ("python aws", ("and", [skill("python"), skill("aws")])),
+    ("python or java", ("or", [skill("python"), skill("java")])),
+    ("NOT java", ("not", skill("java"))),
+    ("not not java", ("not", ("not", skill("java")))),
+    ('"google cloud" AND python', ("and", [skill("google cloud"), skill("python")])),
+    # AND binds tighter than OR
+    ("a OR b AND c", ("or", [skill("a"), ("and", [skill("b"), skill("c")])])),
+])
+def test_parse_query(query, expected):
+    assert parse_query(query) == expected
+
+
+def test_parse_query_nested_groups():
+    tree = parse_query("((react OR vue) AND NOT (angular OR (ember AND jquery))) typescript")
+    assert tree == ("and", [
+        ("and", [
+            ("or", [skill("react"), skill("vue")]),
+            ("not", ("or", [skill("angular"), ("and", [skill("ember"), skill("jquery")])])),
+        ]),
+        skill("typescript"),
+    ])
+    assert positive_skills(tree) == ["react", "vue", "typescript"]
+
+
+@pytest.mark.parametrize("query", [
+    "",
+    "   ",
+    "python AND",
+    "python OR",
+    "NOT",
+    "(python",
+    "((python OR java)",
+    "python)",
+    "AND python",
+    "()",
+    "python OR OR java",
+    '""',
+    '" "',
+])
+def test_parse_query_malformed_or_truncated(query):
+    with pytest.raises(QueryError):
+        parse_query(query)
+
+
+def test_parse_query_normalize():
+    assert parse_query("py AND k8s", {"py": "python", "k8s": "kubernetes"}.get) == (
+        "and", [skill("python"), skill("kubernetes")],
+    )
+
+
+def test_popcount():
+    bits = np.array([0, 1, 0xFFFFFFFFFFFFFFFF], dtype="<u8")
+    assert popcount(bits) == 65
+
+
+def test_search_nested_query(tmp_path):
+    index = SkillIndex(str(tmp_path))
+    index.add("a", {"python": 3.0, "aws": 1.0})
+    index.add("b", {"python": 1.0, "java": 2.0})
+    index.add("c", {"react": 2.0, "aws": 2.0})
+    total, matches = index.search(parse_query("(python OR react) AND NOT java"))
+    assert total == 2
+    assert [key for key, _, _ in matches] == ["a", "c"]
@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+import text_corpus
+from text_corpus import TextCorpus, document_digest
+
+
+def digest(i):
+    return document_digest(f"document {i}".encode())
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    corpus = TextCorpus(str(tmp_path))
+    yield corpus
+    corpus.close()
+
+
+def test_add_and_get(corpus):
+    assert corpus.add(digest(1), "héllo wörld", "pdf")
+    assert not corpus.add(digest(1), "other text")
+    assert corpus.get(digest(1)) == "héllo wörld"
+    assert corpus.get(digest(2)) is None
+    assert len(corpus) == 1
+
+
+def test_reopen_reads_the_index(tmp_path, corpus):
+    for i in range(5):
+        corpus.add(digest(i), f"text {i}")
+    reopened = TextCorpus(str(tmp_path))
+    assert [reopened.get(digest(i)) for i in range(5)] == [f"text {i}" for i in range(5)]
+    reopened.close()
+
+
+def test_torn_index_entry_is_ignored_and_truncated(tmp_path, corpus):
+    for i in range(3):
+        corpus.add(digest(i), f"text {i}")
+    # A writer crashed half-way through its index entry
+    with open(corpus.index_path, "ab") as index:
+        index.write(b"\x01" * (text_corpus._INDEX_ENTRY.size // 2))
+    reopened = TextCorpus(str(tmp_path))
+    assert len(reopened) == 3
+    assert reopened.add(digest(3), "text 3")
+    assert os.path.getsize(reopened.index_path) == 4 * text_corpus._INDEX_ENTRY.size
+    assert [TextCorpus(str(tmp_path)).get(digest(i)) for i in range(4)] == [f"text {i}" for i in range(4)]
+    reopened.close()
+
+
+def test_index_entry_past_the_data_is_ignored(tmp_path, corpus):
+    corpus.add(digest(0), "text 0")
+    # The index entry made it to disk but the data did not
+    with open(corpus.index_path, "ab") as index:
+        index.write(text_corpus._INDEX_ENTRY.pack(digest(1), corpus.data_size(), 100, 0))
+    reopened = TextCorpus(str(tmp_path))
+    assert digest(1) not in reopened
+    assert reopened.add(digest(1), "text 1")
+    assert TextCorpus(str(tmp_path)).get(digest(1)) == "text 1"
+    reopened.close()
+
+
+def test_sees_records_added_by_another_instance(tmp_path, corpus):
+    other = TextCorpus(str(tmp_path))
+    other.add(digest(0), "from the other process")
+    assert corpus.add(digest(1), "mine")
+    assert corpus.get(digest(0)) == "from the other process"
+    other.close()
+
+
+def test_delete(tmp_path, corpus):
+    for i in range(5):
+        corpus.add(digest(i), f"text {i}")
+    assert corpus.delete([digest(1), digest(3), digest(99)]) == 2
+    assert len(corpus) == 3
+    assert corpus.get(digest(1)) is None
+    assert [corpus.get(digest(i)) for i in (0, 2, 4)] == ["text 0", "text 2", "text 4"]
+    assert corpus.delete([digest(1)]) == 0
+    reopened = TextCorpus(str(tmp_path))
+    assert sorted(reopened._index) == sorted([digest(0), digest(2), digest(4)])
+    # The data file no longer holds the deleted text
+    with open(reopened.data_path, "rb") as f:
+        assert b"text 1" not in f.read()
+    reopened.close()
+
+
+def test_delete_is_seen_by_other_instances(tmp_path, corpus):
+    for i in range(3):
+        corpus.add(digest(i), f"text {i}")
+    other = TextCorpus(str(tmp_path))
+    assert other.get(digest(2)) == "text 2"
+    corpus.delete([digest(0)])
+    assert other.get(digest(0)) is None
+    assert other.get(digest(2)) == "text 2"
+    assert other.add(digest(3), "text 3")
+    assert TextCorpus(str(tmp_path)).get(digest(3)) == "text 3"
+    other.close()
+
+
+def test_iter_records_and_byte_ranges(corpus):
+    for i in range(10):
+        corpus.add(digest(i), f"text {i}")
+    seen = []
+    for start, end in corpus.byte_ranges(3):
+        seen.extend(str(view, "utf-8") for _, _, view in corpus.iter_records(start, end))
+    assert seen == [f"text {i}" for i in range(10)]
+
+
+def test_cli_delete_by_file(tmp_path, capsys):
+    directory = str(tmp_path / "corpus")
+    resume = tmp_path / "resume.pdf"
+    resume.write_bytes(b"%PDF fake")
+    corpus = TextCorpus(directory)
+    corpus.add(document_digest(resume.read_bytes()), "resume text", "pdf")
+    corpus.add(digest(1), "other")
+    corpus.close()
+    assert text_corpus.main(["--corpus", directory, "delete", str(resume), digest(1).hex()]) == 0
+    assert "Deleted 2 of 2" in capsys.readouterr().out
+    assert text_corpus.main(["--corpus", directory, "delete", "not-a-digest"]) == 1
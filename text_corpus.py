@@ -0,0 +1,411 @@
+"""Append-only store of extracted resume text, keyed by document hash.
+
+Parsing PDFs and DOCX files is by far the most expensive step of screening.
+Each parse is done once and its text is kept here. A re-upload of the same
+file is then a lookup, and re-running skill extraction over every resume
+after a taxonomy change reads text instead of documents.
+
+Layout, in ``INTERVIEWBOT_DATA_DIR/corpus``:
+
+``texts.dat``  records ``RTX1 | length (u32) | sha256 of the document | UTF-8 text``
+``texts.idx``  fixed-size entries ``sha256 | offset (u64) | length (u32) | kind (u8)``
+
+Data is written before its index entry, so after a crash the index never
+points past the end of the data. Both files are read through ``mmap``. A scan
+hands each worker process a byte range of ``texts.dat``. The worker maps the
+file and takes memoryview slices of the records whose offsets fall in its
+range, so nothing is read into Python buffers until a record is decoded.
+
+The store is off unless ``INTERVIEWBOT_TEXT_CORPUS=1``. Texts are kept in
+plain text until they are deleted: ``delete`` rewrites both files without the
+given documents, and running processes pick up the new files on their next
+lookup.
+
+Usage:
+    python -m text_corpus ingest resumes/            # parse and store PDF/DOCX files
+    python -m text_corpus scan --workers 4 --output skills.jsonl
+    python -m text_corpus delete resume.pdf 3f2a...  # by file or by sha256
+    python -m text_corpus stats
+"""
+import argparse
+import bisect
+import hashlib
+import io
+import json
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import instrumentation
+
+try:
+    import fcntl
+except ImportError:
+    # POSIX only; without it appends are only safe from a single process
+    fcntl = None
+
+ENABLED = os.environ.get("INTERVIEWBOT_TEXT_CORPUS", "").lower() in ("1", "true", "yes")
+CORPUS_DIR = os.path.join(os.environ.get("INTERVIEWBOT_DATA_DIR", "data"), "corpus")
+
+RECORD_MAGIC = b"RTX1"
+_RECORD_HEADER = struct.Struct("<4sI32s")
+_INDEX_ENTRY = struct.Struct("<32sQIB3x")
+KINDS = {"text": 0, "pdf": 1, "docx": 2}
+KIND_NAMES = {code: name for name, code in KINDS.items()}
+
+
+def document_digest(data):
+    return hashlib.sha256(data).digest()
+
+
+def _inode(path):
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+
+
+class TextCorpus:
+    def __init__(self, directory=CORPUS_DIR):
+        self.directory = directory
+        self.data_path = os.path.join(directory, "texts.dat")
+        self.index_path = os.path.join(directory, "texts.idx")
+        self._lock = threading.Lock()
+        self._map = None
+        self._reset()
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, digest):
+        return digest in self._index
+
+    def _reset(self):
+        self.close()
+        self._index = {}
+        self._order = []
+        self._offsets = []
+        self._index_bytes = 0
+        self._mapped_size = 0
+        self._index_inode = _inode(self.index_path)
+        self._load_index()
+
+    def _reload_if_replaced(self):
+        """Start over when ``delete`` (possibly in another process) swapped the files."""
+        if _inode(self.index_path) != self._index_inode:
+            self._reset()
+
+    def _load_index(self):
+        """Read the index entries appended since the last call."""
+        try:
+            data_size = os.path.getsize(self.data_path)
+            with open(self.index_path, "rb") as f:
+                f.seek(self._index_bytes)
+                raw = f.read()
+        except FileNotFoundError:
+            return
+        usable = len(raw) - len(raw) % _INDEX_ENTRY.size
+        for digest, offset, length, kind in _INDEX_ENTRY.iter_unpack(raw[:usable]):
+            if offset + _RECORD_HEADER.size + length > data_size:
+                break
+            self._index_bytes += _INDEX_ENTRY.size
+            if digest in self._index:
+                continue
+            self._index[digest] = (offset, length, kind)
+            self._order.append(digest)
+            self._offsets.append(offset)
+
+    @contextmanager
+    def _append_lock(self):
+        """Exclusive across processes (the app and ``python -m text_corpus ingest``)."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "texts.lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _view(self, offset, length):
+        """Zero-copy view of one record's text bytes."""
+        end = offset + _RECORD_HEADER.size + length
+        if self._map is None or end > self._mapped_size:
+            # The data file grew since it was mapped
+            with open(self.data_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = len(self._map)
+        return memoryview(self._map)[offset + _RECORD_HEADER.size:end]
+
+    def get(self, digest):
+        """Stored text for a document digest, or None."""
+        with self._lock:
+            self._reload_if_replaced()
+            entry = self._index.get(digest)
+            if entry is None:
+                return None
+            view = self._view(entry[0], entry[1])
+            try:
+                # Guards the moment between the two renames in ``delete``
+                magic, length, stored = _RECORD_HEADER.unpack_from(self._map, entry[0])
+                if (magic, length, stored) != (RECORD_MAGIC, entry[1], digest):
+                    return None
+                return str(view, "utf-8")
+            finally:
+                view.release()
+
+    def add(self, digest, text, kind="text"):
+        """Append the text for a document; a no-op if it is already stored."""
+        payload = text.encode("utf-8")
+        with self._lock, self._append_lock():
+            # Pick up what other processes appended or deleted since we last looked
+            self._reload_if_replaced()
+            self._load_index()
+            if digest in self._index:
+                return False
+            with open(self.index_path, "ab") as index:
+                if os.fstat(index.fileno()).st_size > self._index_bytes:
+                    # A torn entry, or one whose data never made it, from a crashed writer
+                    index.truncate(self._index_bytes)
+            with open(self.data_path, "ab") as data:
+                offset = os.fstat(data.fileno()).st_size
+                data.write(_RECORD_HEADER.pack(RECORD_MAGIC, len(payload), digest))
+                data.write(payload)
+                data.flush()
+                os.fsync(data.fileno())
+            with open(self.index_path, "ab") as index:
+                index.write(_INDEX_ENTRY.pack(digest, offset, len(payload), KINDS.get(kind, 0)))
+            self._index_bytes += _INDEX_ENTRY.size
+            self._index[digest] = (offset, len(payload), KINDS.get(kind, 0))
+            self._order.append(digest)
+            self._offsets.append(offset)
+        return True
+
+    def delete(self, digests):
+        """Remove documents by rewriting both files without them; returns how many were stored."""
+        with self._lock, self._append_lock():
+            self._reload_if_replaced()
+            self._load_index()
+            doomed = set(digests) & self._index.keys()
+            if not doomed:
+                return 0
+            data_tmp, index_tmp = self.data_path + ".tmp", self.index_path + ".tmp"
+            with open(data_tmp, "wb") as data, open(index_tmp, "wb") as index:
+                for digest in self._order:
+                    if digest in doomed:
+                        continue
+                    offset, length, kind = self._index[digest]
+                    view = self._view(offset, length)
+                    try:
+                        new_offset = data.tell()
+                        data.write(_RECORD_HEADER.pack(RECORD_MAGIC, length, digest))
+                        data.write(view)
+                    finally:
+                        view.release()
+                    index.write(_INDEX_ENTRY.pack(digest, new_offset, length, kind))
+                for f in (data, index):
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.close()
+            # The index goes last: readers reload when its inode changes
+            os.replace(data_tmp, self.data_path)
+            os.replace(index_tmp, self.index_path)
+            self._reset()
+        return len(doomed)
+
+    def data_size(self):
+        try:
+            return os.path.getsize(self.data_path)
+        except FileNotFoundError:
+            return 0
+
+    def iter_records(self, start=0, end=None):
+        """``(digest, kind, memoryview)`` for records whose offset lies in ``[start, end)``.
+
+        Views point into the shared mapping and are only valid until the next
+        record is requested; decode or copy what needs to be kept.
+        """
+        end = self.data_size() if end is None else end
+        # Records are appended, so offsets are already sorted
+        first = bisect.bisect_left(self._offsets, start)
+        last = bisect.bisect_left(self._offsets, end)
+        for digest in self._order[first:last]:
+            offset, length, kind = self._index[digest]
+            view = self._view(offset, length)
+            try:
+                yield digest, KIND_NAMES.get(kind, "text"), view
+            finally:
+                view.release()
+
+    def byte_ranges(self, parts):
+        """Split the data file into ``parts`` contiguous ranges of about equal size."""
+        size = self.data_size()
+        step = max(size // max(parts, 1), 1)
+        bounds = [min(i * step, size) for i in range(parts)] + [size]
+        return [(bounds[i], bounds[i + 1]) for i in range(parts) if bounds[i] < bounds[i + 1]]
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+_corpus_lock = threading.Lock()
+_corpus = None
+
+
+def get_corpus():
+    """The process-wide corpus shared by all sessions."""
+    global _corpus
+    with _corpus_lock:
+        if _corpus is None:
+            _corpus = TextCorpus(CORPUS_DIR)
+        return _corpus
+
+
+def extract_text_cached(data, kind, extractor):
+    """Return the text of a document, parsing it with ``extractor`` only the first time.
+
+    ``data`` is the document's bytes; ``extractor`` takes a file-like object.
+    Empty results (failed parses) are not stored.
+    """
+    if not ENABLED:
+        return extractor(io.BytesIO(data))
+    corpus = get_corpus()
+    digest = document_digest(data)
+    text = corpus.get(digest)
+    if text is not None:
+        instrumentation.incr("text_corpus_lookups", outcome="hit")
+        return text
+    instrumentation.incr("text_corpus_lookups", outcome="miss")
+    text = extractor(io.BytesIO(data))
+    if text:
+        corpus.add(digest, text, kind)
+    return text
+
+
+def _scan_range(args):
+    """Worker: skill profile of every record in one byte range."""
+    directory, start, end = args
+    from interview_core import extract_skill_profile
+
+    corpus = TextCorpus(directory)
+    results = []
+    for digest, kind, view in corpus.iter_records(start, end):
+        profile = extract_skill_profile(str(view, "utf-8"))
+        results.append({
+            "digest": digest.hex(), "kind": kind, "skills": profile.to_skills_dict(), "evidence": profile.to_dict(),
+            "weights": {skill: round(profile.weight(skill), 3) for skill in profile.skills},
+        })
+    corpus.close()
+    return results
+
+
+def scan(directory=CORPUS_DIR, workers=None, on_result=None):
+    """Re-run skill extraction over the whole corpus in parallel; returns the record count."""
+    workers = workers or os.cpu_count() or 1
+    ranges = TextCorpus(directory).byte_ranges(workers)
+    count = 0
+    if workers == 1 or len(ranges) <= 1:
+        batches = map(_scan_range, [(directory, start, end) for start, end in ranges])
+        for batch in batches:
+            for result in batch:
+                count += 1
+                if on_result:
+                    on_result(result)
+        return count
+    with multiprocessing.Pool(len(ranges)) as pool:
+        for batch in pool.imap_unordered(_scan_range, [(directory, start, end) for start, end in ranges]):
+            for result in batch:
+                count += 1
+                if on_result:
+                    on_result(result)
+    return count
+
+
+def ingest(paths, directory=CORPUS_DIR):
+    """Parse and store PDF/DOCX files (directories are walked); returns ``(added, skipped)``."""
+    from interview_core import extract_text_from_docx, extract_text_from_pdf
+
+    extractors = {"pdf": extract_text_from_pdf, "docx": extract_text_from_docx}
+    corpus = TextCorpus(directory)
+    added = skipped = 0
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(root, name) for root, _, names in os.walk(path) for name in sorted(names))
+        else:
+            files.append(path)
+    for path in files:
+        kind = path.rsplit(".", 1)[-1].lower()
+        if kind not in extractors:
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = document_digest(data)
+        if digest in corpus:
+            skipped += 1
+            continue
+        text = extractors[kind](io.BytesIO(data))
+        if text and corpus.add(digest, text, kind):
+            added += 1
+    corpus.close()
+    return added, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="Corpus directory (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = commands.add_parser("ingest", help="Parse and store resume files")
+    ingest_parser.add_argument("paths", nargs="+")
+    scan_parser = commands.add_parser("scan", help="Re-run skill extraction over the stored texts")
+    scan_parser.add_argument("--workers", type=int, default=os.cpu_count())
+    scan_parser.add_argument("--output", help="Write one JSON line per resume")
+    delete_parser = commands.add_parser("delete", help="Remove stored texts")
+    delete_parser.add_argument("documents", nargs="+", help="Resume files or sha256 hex digests")
+    commands.add_parser("stats")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == "ingest":
+        added, skipped = ingest(args.paths, args.corpus)
+        print(f"Added {added}, already stored {skipped} in {time.perf_counter() - start:.2f}s")
+    elif args.command == "scan":
+        out = open(args.output, "w", encoding="utf-8") if args.output else None
+        try:
+            count = scan(args.corpus, args.workers, (lambda r: out.write(json.dumps(r) + "\n")) if out else None)
+        finally:
+            if out:
+                out.close()
+        elapsed = time.perf_counter() - start
+        print(f"Scanned {count} resumes with {args.workers} workers in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.0f}/s)")
+    elif args.command == "delete":
+        digests = []
+        for document in args.documents:
+            if os.path.isfile(document):
+                with open(document, "rb") as f:
+                    digests.append(document_digest(f.read()))
+            else:
+                try:
+                    digests.append(bytes.fromhex(document))
+                except ValueError:
+                    print(f"Not a file or a sha256 digest: {document}")
+                    return 1
+        corpus = TextCorpus(args.corpus)
+        print(f"Deleted {corpus.delete(digests)} of {len(digests)} documents, {len(corpus)} texts left")
+        corpus.close()
+    else:
+        corpus = TextCorpus(args.corpus)
+        print(f"{len(corpus)} texts, {corpus.data_size() / 2 ** 20:.1f} MB in {args.corpus}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())